@@ -0,0 +1,88 @@
+import argparse
+import statistics
+import time
+
+import numpy as np
+import pandas as pd
+
+from spotify_db import SUMMARY_FEATURES, SUMMARY_TOP_K
+from track_analytics import feature_matrix, sort_tracklist, top_bottom_tracks
+
+# Times track_analytics against the per-feature pandas code it replaced, on a synthetic discography.
+# Feature values are rounded to 3 decimals like Spotify's, so there are plenty of ties; each run also
+# checks both versions pick the same tracks in the same order.
+#
+#   python3 spotify-app/benchmark_analytics.py
+#   python3 spotify-app/benchmark_analytics.py --tracks 50000 --albums 2000 --runs 20
+
+
+def synthetic_discography(tracks, albums, missing, seed):
+    rng = np.random.default_rng(seed)
+    album_index = np.sort(rng.integers(0, albums, tracks))
+    df = pd.DataFrame({
+        'track_id': [f't{i}' for i in range(tracks)],
+        'album_name': [f'Album {i}' for i in album_index],
+        'track_number': rng.integers(1, 30, tracks)
+    })
+    for feature in SUMMARY_FEATURES:
+        values = rng.random(tracks).round(3)
+        values[rng.random(tracks) < missing] = np.nan
+        df[feature] = values
+    return df
+
+
+def pandas_top_bottom(df, k):
+    # What the Top Moods block used to do: two sorts per feature
+    top, bottom = {}, {}
+    for feature in SUMMARY_FEATURES:
+        present = df[df[feature].notna()]
+        top[feature] = present.sort_values(feature, ascending=False, kind='stable').head(k)['track_id'].tolist()
+        bottom[feature] = present.sort_values(feature, kind='stable').head(k)['track_id'].tolist()
+    return top, bottom
+
+
+def numpy_top_bottom(df, k):
+    return top_bottom_tracks(df['track_id'].to_numpy(dtype=object), feature_matrix(df, SUMMARY_FEATURES),
+                             SUMMARY_FEATURES, k)
+
+
+def pandas_tracklist(df):
+    # What tracklist_trend used to do: a sort per album group
+    return pd.concat(group.sort_values('track_number', kind='stable')
+                     for _, group in df.groupby('album_name')).reset_index(drop=True)
+
+
+def median_ms(function, runs):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the vectorized top-k and tracklist helpers")
+    parser.add_argument("--tracks", type=int, default=10000)
+    parser.add_argument("--albums", type=int, default=500)
+    parser.add_argument("--missing", type=float, default=0.01, help="fraction of feature values left out")
+    parser.add_argument("--top-k", type=int, default=SUMMARY_TOP_K)
+    parser.add_argument("--runs", type=int, default=10, help="timed runs per case (median is reported)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    df = synthetic_discography(args.tracks, args.albums, args.missing, args.seed)
+
+    same_tracks = pandas_top_bottom(df, args.top_k) == numpy_top_bottom(df, args.top_k)
+    same_order = pandas_tracklist(df)['track_id'].tolist() == sort_tracklist(df)['track_id'].tolist()
+    print(f"benchmark_analytics: {args.tracks} tracks, {args.albums} albums, "
+          f"same top/bottom tracks: {same_tracks}, same tracklist order: {same_order}")
+
+    cases = [
+        ('top/bottom k', lambda: pandas_top_bottom(df, args.top_k), lambda: numpy_top_bottom(df, args.top_k)),
+        ('tracklist', lambda: pandas_tracklist(df), lambda: sort_tracklist(df))
+    ]
+    for name, before, after in cases:
+        before_ms, after_ms = median_ms(before, args.runs), median_ms(after, args.runs)
+        print(f"benchmark_analytics: {name:<14} pandas {before_ms:8.2f} ms  vectorized {after_ms:8.2f} ms  "
+              f"({before_ms / after_ms:.1f}x)")
@@ -0,0 +1,118 @@
+import argparse
+import importlib.util
+import os
+import random
+import time
+import uuid
+from contextlib import contextmanager
+
+from spotify_db import DynamoBatchWriter, PACKED_FLOAT_COLUMNS, build_entry
+
+# Times writing one synthetic discography to DynamoDB through DynamoBatchWriter and through the
+# per-batch awswrangler put_df path create_entries used before it (skipped if awswrangler is not
+# installed). Runs against moto by default, or against a real endpoint such as DynamoDB Local;
+# the tables are created for the run and deleted afterwards.
+#
+#   python3 spotify-app/benchmark_batch_writer.py
+#   python3 spotify-app/benchmark_batch_writer.py --tracks 5000 --workers 8
+#   python3 spotify-app/benchmark_batch_writer.py --endpoint-url http://localhost:8000
+
+
+def synthetic_entries(tracks, artist_id='ar1', tracks_per_album=12, seed=0):
+    # What create_entries writes for an artist, 12 tracks to an album
+    rng = random.Random(seed)
+    artist_data = {'name': 'Synthetic Artist', 'followers': {'total': 1000}, 'popularity': 50, 'genres': ['pop', 'rock']}
+    entries = []
+    for i in range(tracks):
+        album_index = i // tracks_per_album
+        album_info = {
+            'album_id': f'al{album_index}', 'album_type': 'album', 'album_name': f'Album {album_index}',
+            'total_tracks': tracks_per_album, 'available_markets': ['US'] * 80,
+            'images': [{'url': f'https://i.scdn.co/image/{album_index}', 'height': 640, 'width': 640}]
+        }
+        track_info = {'track_id': f't{i}', 'track_name': f'Track {i}', 'track_number': i % tracks_per_album + 1,
+                      'key': rng.randrange(12), 'duration_ms': rng.randrange(120000, 300000), 'time_signature': 4}
+        for feature in PACKED_FLOAT_COLUMNS:
+            track_info[feature] = round(rng.random(), 3)
+        entries.append(build_entry(artist_data, artist_id, album_info, track_info))
+    return entries
+
+
+@contextmanager
+def dynamodb_backend(endpoint_url):
+    import boto3
+
+    if endpoint_url:
+        yield boto3.client('dynamodb', endpoint_url=endpoint_url)
+        return
+
+    from moto import mock_aws
+
+    for name, value in (('AWS_DEFAULT_REGION', 'us-east-1'), ('AWS_ACCESS_KEY_ID', 'benchmark'),
+                        ('AWS_SECRET_ACCESS_KEY', 'benchmark')):
+        os.environ.setdefault(name, value)
+    with mock_aws():
+        yield boto3.client('dynamodb')
+
+
+def create_track_table(client):
+    table_name = f'benchmark-{uuid.uuid4().hex[:8]}'
+    client.create_table(
+        TableName=table_name,
+        KeySchema=[{'AttributeName': 'artist_id', 'KeyType': 'HASH'}, {'AttributeName': 'track_id', 'KeyType': 'RANGE'}],
+        AttributeDefinitions=[{'AttributeName': 'artist_id', 'AttributeType': 'S'}, {'AttributeName': 'track_id', 'AttributeType': 'S'}],
+        BillingMode='PAY_PER_REQUEST'
+    )
+    client.get_waiter('table_exists').wait(TableName=table_name)
+    return table_name
+
+
+def write_with_batch_writer(client, table_name, entries, workers):
+    writer = DynamoBatchWriter(table_name, client=client, max_workers=workers)
+    try:
+        writer.write_all(entries)
+    finally:
+        writer.close()
+
+
+def write_with_put_df(client, table_name, entries, workers):
+    # The old writer stage: a DataFrame per 25 entries handed to awswrangler, one batch at a time
+    import awswrangler as wr
+    import boto3
+    import pandas as pd
+
+    session = boto3.Session(region_name=client.meta.region_name)
+    for start in range(0, len(entries), 25):
+        wr.dynamodb.put_df(df=pd.DataFrame(entries[start:start + 25]), table_name=table_name, boto3_session=session)
+
+
+def count_items(client, table_name):
+    paginator = client.get_paginator('scan')
+    return sum(page['Count'] for page in paginator.paginate(TableName=table_name, Select='COUNT'))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark DynamoBatchWriter against the old put_df write path")
+    parser.add_argument("--tracks", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=4, help="DynamoBatchWriter threads")
+    parser.add_argument("--endpoint-url", help="DynamoDB endpoint to use instead of moto (e.g. DynamoDB Local)")
+    args = parser.parse_args()
+
+    entries = synthetic_entries(args.tracks)
+    writers = [('DynamoBatchWriter', write_with_batch_writer)]
+    if importlib.util.find_spec('awswrangler'):
+        writers.append(('put_df per batch', write_with_put_df))
+    else:
+        print("benchmark_batch_writer: awswrangler not installed, skipping the put_df baseline")
+
+    with dynamodb_backend(args.endpoint_url) as client:
+        for name, write in writers:
+            table_name = create_track_table(client)
+            try:
+                start = time.perf_counter()
+                write(client, table_name, entries, args.workers)
+                elapsed = time.perf_counter() - start
+                print(f"benchmark_batch_writer: {name:<18} {args.tracks} tracks in {elapsed:6.2f} s "
+                      f"({args.tracks / elapsed:7.0f} items/s), {count_items(client, table_name)} stored")
+            finally:
+                client.delete_table(TableName=table_name)
@@ -0,0 +1,77 @@
+import argparse
+import base64
+import gzip
+import statistics
+import time
+
+from boto3.dynamodb.types import TypeSerializer
+
+from benchmark_batch_writer import synthetic_entries
+from search_encoding import SEARCH_FORMATS, decode_search_response, encode_search_response
+from spotify_db import DASHBOARD_COLUMNS, decode_items, summarize_frame
+
+# Builds the /search DataFrame for a synthetic discography the way search_artist does (stored items
+# through decode_items) and, for every wire format with and without gzip, reports the size on the
+# wire, the Lambda's encode time and the Streamlit side's decode time. Wire size is after base64 for
+# the formats API Gateway gets base64-encoded. Arrow rows are skipped if pyarrow is not installed.
+#
+#   python3 spotify-app/benchmark_search_encoding.py
+#   python3 spotify-app/benchmark_search_encoding.py --tracks 300 2000 5000 --repeat 11
+
+
+def search_frame(tracks):
+    serializer = TypeSerializer()
+    items = [{key: serializer.serialize(value) for key, value in entry.items() if value is not None}
+             for entry in synthetic_entries(tracks)]
+    df = decode_items([items], DASHBOARD_COLUMNS)
+    return df, summarize_frame('ar1', df)['radar_chart']
+
+
+def median_ms(function, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        timings.append((time.perf_counter() - start) * 1000)
+    return result, statistics.median(timings)
+
+
+def measure(df, radar_chart, response_format, accept_encoding, repeat):
+    response, encode_ms = median_ms(lambda: encode_search_response(df, radar_chart, response_format, accept_encoding), repeat)
+    if response['headers']['X-Search-Format'] != response_format:
+        return None
+
+    body = response['body'].encode('utf-8')
+    wire_bytes = len(body)
+    if response.get('isBase64Encoded'):
+        body = base64.b64decode(body)
+    if response['headers'].get('Content-Encoding') == 'gzip':
+        # aiohttp decompresses before the client decodes, so that is part of the decode time
+        (decoded, _), decode_ms = median_ms(lambda: decode_search_response(gzip.decompress(body), response['headers']), repeat)
+    else:
+        (decoded, _), decode_ms = median_ms(lambda: decode_search_response(body, response['headers']), repeat)
+
+    if decoded.shape != df.shape:
+        raise SystemExit(f"benchmark_search_encoding: {response_format} decoded to {decoded.shape}, expected {df.shape}")
+    return wire_bytes, encode_ms, decode_ms
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Payload size, encode and decode time of the /search wire formats")
+    parser.add_argument("--tracks", type=int, nargs='+', default=[300, 2000])
+    parser.add_argument("--repeat", type=int, default=7, help="timed runs per cell (median reported)")
+    args = parser.parse_args()
+
+    for tracks in args.tracks:
+        df, radar_chart = search_frame(tracks)
+        print(f"benchmark_search_encoding: {tracks} tracks, {df.shape[1]} columns")
+        print(f"{'format':<8} {'encoding':<8} {'wire KB':>9} {'encode ms':>10} {'decode ms':>10}")
+        for response_format in SEARCH_FORMATS:
+            for accept_encoding in ('', 'gzip'):
+                result = measure(df, radar_chart, response_format, accept_encoding, args.repeat)
+                if result is None:
+                    print(f"{response_format:<8} {accept_encoding or 'plain':<8} {'skipped (format not available)':>31}")
+                    continue
+                wire_bytes, encode_ms, decode_ms = result
+                print(f"{response_format:<8} {accept_encoding or 'plain':<8} {wire_bytes / 1024:9.1f} {encode_ms:10.1f} {decode_ms:10.1f}")
+        print()
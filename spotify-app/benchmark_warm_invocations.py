@@ -0,0 +1,125 @@
+import argparse
+import contextlib
+import io
+import json
+import statistics
+import time
+
+import lambda_function
+import spotify_api
+import spotify_db
+from benchmark_batch_writer import dynamodb_backend
+
+# Times repeated lambda_handler invocations in one process, i.e. a warm container, two ways:
+#   fresh clients - runtime.close() before every call, so each one builds a new event loop,
+#                   Spotify session and DynamoDB client, as every invocation did before LambdaRuntime
+#   warm runtime  - the loop and clients are kept between calls
+# The in-process artist caches are emptied before every call so /search reads DynamoDB each time.
+#
+# Needs Spotify credentials (CLIENT_ID/CLIENT_SECRET) and the app's DynamoDB tables. With --moto the
+# tables are created in moto and the artist is ingested once before timing; --spotify-url points the
+# client at another server (e.g. a local mock of the Web API). /user_data also needs --user-token.
+# moto's request handling dominates /search timings, so compare the two modes against real tables.
+#
+#   python3 spotify-app/benchmark_warm_invocations.py --artist "Daft Punk" --moto
+#   python3 spotify-app/benchmark_warm_invocations.py --artist "Daft Punk" --user-token <token> --runs 100
+
+
+def use_spotify_url(base_url):
+    class LocalSpotifyAPI(spotify_api.SpotifyAPI):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.base_url = base_url.rstrip('/') + '/v1/'
+            self.token_url = base_url.rstrip('/') + '/api/token'
+
+    lambda_function.SpotifyAPI = LocalSpotifyAPI
+
+
+def create_app_tables(client):
+    tables = {
+        spotify_db.TABLE_NAME: [('artist_id', 'HASH'), ('track_id', 'RANGE')],
+        spotify_db.SEARCH_TABLE_NAME: [('query', 'HASH')],
+        spotify_db.LEASE_TABLE_NAME: [('artist_id', 'HASH')],
+        spotify_db.SUMMARY_TABLE_NAME: [('artist_id', 'HASH')]
+    }
+    for table_name, keys in tables.items():
+        client.create_table(
+            TableName=table_name,
+            KeySchema=[{'AttributeName': name, 'KeyType': key_type} for name, key_type in keys],
+            AttributeDefinitions=[{'AttributeName': name, 'AttributeType': 'S'} for name, _ in keys],
+            BillingMode='PAY_PER_REQUEST'
+        )
+
+
+def clear_artist_caches():
+    spotify_db.artist_cache.entries.clear()
+    spotify_db.artist_cache.aliases.clear()
+    spotify_db.artist_cache.bytes = 0
+    spotify_db.artist_summaries.memory.clear()
+
+
+def invoke(event):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return lambda_function.lambda_handler(event, None)
+
+
+def check_response(event, result):
+    # Error responses would time the failure path, so stop instead
+    status = (json.loads(result) if isinstance(result, str) else result).get('statusCode', 200)
+    if status >= 400:
+        raise SystemExit(f"benchmark_warm_invocations: {event['rawPath']} returned {status}")
+
+
+def time_invocations(event, runs, fresh_clients):
+    timings = []
+    for _ in range(runs):
+        if fresh_clients:
+            lambda_function.runtime.close()
+        if event['rawPath'] == '/search':
+            clear_artist_caches()
+        start = time.perf_counter()
+        result = invoke(event)
+        timings.append((time.perf_counter() - start) * 1000)
+        check_response(event, result)
+    return timings
+
+
+def run(events, runs):
+    for event in events:
+        # One untimed call so imports and the first token fetch don't count
+        check_response(event, invoke(event))
+        for label, fresh_clients in (('fresh clients', True), ('warm runtime', False)):
+            timings = sorted(time_invocations(event, runs, fresh_clients))
+            print(f"benchmark_warm_invocations: {event['rawPath']:<12} {label:<14} "
+                  f"p50 {statistics.median(timings):7.2f} ms  p90 {timings[int(len(timings) * 0.9)]:7.2f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-invocation latency with fresh clients vs the warm runtime")
+    parser.add_argument("--artist", required=True, help="artist to search for (ingested first with --moto)")
+    parser.add_argument("--user-token", help="Spotify user access token; also times /user_data")
+    parser.add_argument("--runs", type=int, default=50)
+    parser.add_argument("--moto", action="store_true", help="create the DynamoDB tables in moto")
+    parser.add_argument("--spotify-url", help="Spotify Web API base URL (default: the real API)")
+    parser.add_argument("--spotify-rate", type=float,
+                        help="raise the request scheduler's rate limit (requests/s) for a local server")
+    args = parser.parse_args()
+
+    if args.spotify_url:
+        use_spotify_url(args.spotify_url)
+    if args.spotify_rate:
+        bucket = spotify_api.request_scheduler.bucket
+        bucket.rate = bucket.capacity = bucket.tokens = args.spotify_rate
+
+    events = [{"rawPath": "/search", "queryStringParameters": {"artist": args.artist}}]
+    if args.user_token:
+        events.append({"rawPath": "/user_data", "queryStringParameters": {"Authorization": f"Bearer {args.user_token}"}})
+
+    if args.moto:
+        with dynamodb_backend(None) as client:
+            create_app_tables(client)
+            run(events, args.runs)
+    else:
+        run(events, args.runs)
+
+    lambda_function.runtime.close()
@@ -1,52 +1,108 @@
-import io
-import boto3
-import base64
-import random
-import pandas as pd
-import awswrangler as wr
-from decimal import Decimal
-from spotify_db import search_view
 from spotify_api import SpotifyAPI
+from request_scheduler import SpotifyAPIError
+from search_encoding import encode_search_response, encode_summary_response, DEFAULT_SEARCH_FORMAT
 import json
 import asyncio
+import atexit
+import sys
+import aiohttp
+
+# spotify_db (and with it pandas, numpy and boto3) is imported by the /search route only, so
+# /user_data and /get_recommendations cold starts don't pay for it. profile_imports.py
+# reports the import cost of each route.
 
 global_headers = None
 
-async def wait_search_view(artist_name):
 
-    # Await the asynchronous function call
-    df = await search_view(artist_name)
+def connection_errors():
+    # botocore is loaded by the /search route only; until then none of its errors can be raised
+    errors = (aiohttp.ClientConnectionError, asyncio.TimeoutError)
+    botocore_exceptions = sys.modules.get('botocore.exceptions')
+    if botocore_exceptions is not None:
+        errors += (botocore_exceptions.ConnectionError,)
+    return errors
+
 
-    ## For Radar Chart
-    desired_columns = ['instrumentalness', 'acousticness', 'danceability',
-                       'energy', 'liveness', 'speechiness', 'valence']
-    df_selected = df[desired_columns]
+class LambdaRuntime:
+    # Everything an invocation needs that is expensive to build: the event loop, the pooled
+    # Spotify session and the DynamoDB clients. Created once per container and reused while warm.
+    def __init__(self):
+        self.loop = None
+        self.spotify_client = None
 
-    avg_values = df_selected.mean()
+    def get_loop(self):
+        if self.loop is None or self.loop.is_closed():
+            self.loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self.loop)
+        return self.loop
 
-    feature_list = avg_values.index.tolist()
-    value_list = avg_values.values.tolist()
+    def get_spotify_client(self):
+        if self.spotify_client is None:
+            self.spotify_client = SpotifyAPI()
+        return self.spotify_client
 
-    # Construct the dictionary
-    avg_dict = {"feature": feature_list, "value": value_list}
+    def run(self, coro):
+        try:
+            return self.get_loop().run_until_complete(coro)
+        except connection_errors() as e:
+            # Pooled connections may have gone stale while the container was frozen; rebuild on the next call
+            print(f"lambda_function: Connection error ({e!r}), resetting clients")
+            self.reset()
+            raise
 
-    # Convert avg_dict to JSON
-    avg_dict_json = json.dumps(avg_dict)
+    def reset(self):
+        if self.spotify_client is not None:
+            try:
+                self.get_loop().run_until_complete(self.spotify_client.close())
+            except Exception as e:
+                print(f"lambda_function: Error closing Spotify session: {e!r}")
+            self.spotify_client = None
+        # DynamoDB clients only exist if a /search ran in this container
+        spotify_db = sys.modules.get('spotify_db')
+        if spotify_db is not None:
+            spotify_db.reset_clients()
+
+    def close(self):
+        self.reset()
+        if self.loop is not None and not self.loop.is_closed():
+            self.loop.close()
+
+
+runtime = LambdaRuntime()
+atexit.register(runtime.close)
 
-    response = {
-        "df": df.to_json(),
-        "radar_chart": avg_dict_json
-    }
-    
-    print(response)
+
+def get_spotify_client():
+    return runtime.get_spotify_client()
+
+async def wait_search_view(artist_name, response_format=DEFAULT_SEARCH_FORMAT, accept_encoding=''):
+    from spotify_db import search_artist
+
+    # Await the asynchronous function call; repeat searches come from the in-process artist cache
+    entry = await search_artist(artist_name, get_spotify_client())
+
+    if entry is None:
+        return json.dumps({"statusCode": 404, "body": "No such artist exists!"})
+
+    # The client picks the body format (see search_encoding); gzip when it accepts it
+    response = encode_search_response(entry["df"], entry["radar_chart"], response_format, accept_encoding)
 
     return json.dumps(response)
 
-def wait_recommendations(headers):
-    
-    spotify_api = SpotifyAPI()
+async def wait_summary_view(artist_name, accept_encoding=''):
+    from spotify_db import search_artist_summary
+
+    # Aggregates only; no track rows are read when the artist's summary is stored
+    summary = await search_artist_summary(artist_name, get_spotify_client())
 
-    resp = spotify_api.get_recommendations(headers)
+    if summary is None:
+        return json.dumps({"statusCode": 404, "body": "No such artist exists!"})
+
+    return encode_summary_response(summary, accept_encoding)
+
+async def wait_recommendations(headers):
+
+    resp = await get_spotify_client().get_recommendations(headers)
 
     return resp
 
@@ -58,10 +114,28 @@ def lambda_handler(event, context):
     if event["rawPath"] == "/search":
         params = event["queryStringParameters"]
         artist_name = params["artist"]
+        response_format = params.get("format", DEFAULT_SEARCH_FORMAT)
+        accept_encoding = (event.get("headers") or {}).get("accept-encoding", "")
         
         try:
-            result = asyncio.get_event_loop().run_until_complete(wait_search_view(artist_name))
+            result = runtime.run(wait_search_view(artist_name, response_format, accept_encoding))
             return result
+
+        except SpotifyAPIError as e:
+            print(f"lambda_function: Spotify API error: {e}")
+            if e.status == 429:
+                # Pass the throttle through so the client can back off instead of retrying blindly
+                resp = {
+                    "statusCode": 429,
+                    "headers": {"Retry-After": str(int(e.retry_after or 1))},
+                    "body": "Too many requests. Please try again shortly."
+                }
+            else:
+                resp = {
+                    "statusCode": 502,
+                    "body": "An error occurred while contacting Spotify. Please try again later."
+                }
+            return json.dumps(resp)
         
         except Exception as e:
             error_message = "An error occurred. Please try again later."
@@ -71,6 +145,21 @@ def lambda_handler(event, context):
             }
             return json.dumps(resp)
     
+    elif event["rawPath"] == "/summary":
+        params = event["queryStringParameters"]
+        artist_name = params["artist"]
+        accept_encoding = (event.get("headers") or {}).get("accept-encoding", "")
+
+        try:
+            return runtime.run(wait_summary_view(artist_name, accept_encoding))
+
+        except SpotifyAPIError as e:
+            print(f"lambda_function: Spotify API error: {e}")
+            return json.dumps({"statusCode": 502, "body": "An error occurred while contacting Spotify. Please try again later."})
+
+        except Exception as e:
+            return json.dumps({"statusCode": 500, "body": "An error occurred. Please try again later."})
+
     elif event["rawPath"] == "/user_data":
         print("lambda_function: Getting User Data")
 
@@ -83,11 +172,9 @@ def lambda_handler(event, context):
 
         global_headers = headers
 
-        spotify_api = SpotifyAPI()
-
         print("lambda_function.py: Getting User Data")
 
-        resp = spotify_api.get_user_data(headers)
+        resp = runtime.run(get_spotify_client().get_user_data(headers))
 
         print(resp)
 
@@ -98,7 +185,7 @@ def lambda_handler(event, context):
 
         print(global_headers)
 
-        resp = wait_recommendations(global_headers)
+        resp = runtime.run(wait_recommendations(global_headers))
 
         print(resp)
 
@@ -1,6 +1,5 @@
 import requests
 import urllib.parse
-import json
 from datetime import datetime, timedelta
 from flask import Flask, redirect, request, jsonify, session
 from collections import Counter
@@ -8,6 +7,7 @@ import itertools
 import os
 from dotenv import load_dotenv
 import time
+from session_store import session_store
 
 load_dotenv()
 
@@ -202,14 +202,14 @@ def streamlit_ui():
 
     if response.status_code == 200:
     
-        user_data = json.dumps(response.json())
-        user_data = urllib.parse.quote(user_data)
+        # Streamlit fetches the dashboard payload from the shared session store; only the token goes in the URL
+        token = session_store.put(response.json())
 
         user_end_time = time.time() - start_time
 
         print(f"Flask Spotify: Time taken for obtaining user info: {user_end_time} seconds")
 
-        return redirect(f'http://{PUBLIC_IP}:8501?user={user_data}')
+        return redirect(f'http://{PUBLIC_IP}:8501?session={token}')
     
     else:
 
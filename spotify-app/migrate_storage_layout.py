@@ -0,0 +1,173 @@
+import argparse
+import json
+import math
+import time
+from collections import defaultdict
+
+import boto3
+from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
+
+from spotify_db import (TABLE_NAME, COMPACT_TABLE_NAME, DynamoBatchWriter,
+                        build_compact_artist_item, build_compact_album_items)
+
+# Backfills the compact layout (see spotify_db.COMPACT_TABLE_NAME) from the one-item-per-track
+# table and reports item sizes and read/write capacity for both layouts.
+#
+#   python3 spotify-app/migrate_storage_layout.py --dry-run
+#   python3 spotify-app/migrate_storage_layout.py --artist-id <id> --create-table
+
+
+def attribute_size(value):
+    # Approximates DynamoDB's item size accounting for a low-level attribute value
+    (kind, data), = value.items()
+    if kind == 'S':
+        return len(data.encode('utf-8'))
+    if kind == 'N':
+        return (len(data.lstrip('-').replace('.', '')) + 1) // 2 + 1
+    if kind == 'B':
+        return len(data)
+    if kind in ('BOOL', 'NULL'):
+        return 1
+    if kind == 'L':
+        return 3 + sum(attribute_size(element) + 1 for element in data)
+    if kind == 'M':
+        return 3 + sum(len(key.encode('utf-8')) + attribute_size(element) + 1 for key, element in data.items())
+    return sum(len(str(element)) for element in data)
+
+
+def item_size(item):
+    return sum(len(name.encode('utf-8')) + attribute_size(value) for name, value in item.items())
+
+
+def capacity(sizes):
+    # Query RCU (eventually consistent, 4 KB units over the summed size) and WCU (1 KB per item)
+    return {
+        'items': len(sizes),
+        'bytes': sum(sizes),
+        'rcu': math.ceil(sum(sizes) / 4096) / 2,
+        'wcu': sum(math.ceil(size / 1024) for size in sizes)
+    }
+
+
+def scan_artists(client, source_table, artist_ids=None):
+    # Yields (artist_id, low-level items) for the requested artists, or the whole table
+    if artist_ids:
+        paginator = client.get_paginator('query')
+        for artist_id in artist_ids:
+            items = []
+            for page in paginator.paginate(
+                TableName=source_table,
+                KeyConditionExpression='#artist_id = :artist_id',
+                ExpressionAttributeNames={'#artist_id': 'artist_id'},
+                ExpressionAttributeValues={':artist_id': {'S': artist_id}}
+            ):
+                items += page['Items']
+            yield artist_id, items
+        return
+
+    grouped = defaultdict(list)
+    for page in client.get_paginator('scan').paginate(TableName=source_table):
+        for item in page['Items']:
+            grouped[item['artist_id']['S']].append(item)
+    yield from grouped.items()
+
+
+def json_loads(value):
+    return json.loads(value) if isinstance(value, str) else value
+
+
+def to_compact_items(artist_id, legacy_items):
+    deserializer = TypeDeserializer()
+    rows = [{key: deserializer.deserialize(value) for key, value in item.items()} for item in legacy_items]
+
+    first = rows[0]
+    artist_data = {
+        'name': first['name'],
+        'followers': {'total': int(first['followers'])},
+        'popularity': int(first['popularity']),
+        'genres': json_loads(first['genres'])
+    }
+
+    # Rows written before album_id was stored are grouped by album name instead
+    albums = {}
+    for row in rows:
+        album_key = row.get('album_id') or row['album_name']
+        if album_key not in albums:
+            albums[album_key] = {
+                'album_id': row.get('album_id'),
+                'album_name': row['album_name'],
+                'album_type': row['album_type'],
+                'total_tracks': int(row['total_tracks']),
+                'available_markets': json_loads(row['available_markets']),
+                'images': json_loads(row['images']),
+                'tracks': []
+            }
+        albums[album_key]['tracks'].append(row)
+
+    items = [build_compact_artist_item(artist_data, artist_id)]
+    for album_info in albums.values():
+        album_info['tracks'].sort(key=lambda track: int(track['track_number']))
+        items += build_compact_album_items(artist_id, album_info)
+    return items
+
+
+def create_compact_table(client, table_name):
+    client.create_table(
+        TableName=table_name,
+        KeySchema=[{'AttributeName': 'artist_id', 'KeyType': 'HASH'},
+                   {'AttributeName': 'sk', 'KeyType': 'RANGE'}],
+        AttributeDefinitions=[{'AttributeName': 'artist_id', 'AttributeType': 'S'},
+                              {'AttributeName': 'sk', 'AttributeType': 'S'}],
+        BillingMode='PAY_PER_REQUEST'
+    )
+    client.get_waiter('table_exists').wait(TableName=table_name)
+
+
+def migrate(source_table=TABLE_NAME, target_table=COMPACT_TABLE_NAME, artist_ids=None, dry_run=False,
+            client=None):
+    client = client or boto3.client('dynamodb')
+    serializer = TypeSerializer()
+    writer = None if dry_run else DynamoBatchWriter(target_table, client=client)
+
+    before_sizes, after_sizes, artists = [], [], 0
+    start_time = time.time()
+    try:
+        for artist_id, legacy_items in scan_artists(client, source_table, artist_ids):
+            if not legacy_items:
+                print(f"migrate_storage_layout: No items for artist {artist_id}")
+                continue
+
+            compact_items = to_compact_items(artist_id, legacy_items)
+            before_sizes += [item_size(item) for item in legacy_items]
+            after_sizes += [item_size({key: serializer.serialize(value) for key, value in item.items() if value is not None})
+                            for item in compact_items]
+            artists += 1
+
+            if writer:
+                writer.write_all(compact_items)
+    finally:
+        if writer:
+            writer.close()
+
+    before, after = capacity(before_sizes), capacity(after_sizes)
+    print(f"migrate_storage_layout: Migrated {artists} artists in {time.time() - start_time:.2f} seconds"
+          f"{' (dry run)' if dry_run else ''}")
+    for label, stats in (('before', before), ('after', after)):
+        print(f"migrate_storage_layout: {label:>6}: {stats['items']} items, {stats['bytes']} bytes, "
+              f"~{stats['rcu']} RCU to read, {stats['wcu']} WCU to write")
+    return before, after
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill the compact storage layout from the per-track table")
+    parser.add_argument("--source", default=TABLE_NAME)
+    parser.add_argument("--target", default=COMPACT_TABLE_NAME)
+    parser.add_argument("--artist-id", action="append", dest="artist_ids")
+    parser.add_argument("--dry-run", action="store_true", help="only report sizes and capacity")
+    parser.add_argument("--create-table", action="store_true", help="create the target table first")
+    args = parser.parse_args()
+
+    dynamodb = boto3.client('dynamodb')
+    if args.create_table and not args.dry_run:
+        create_compact_table(dynamodb, args.target)
+    migrate(args.source, args.target, args.artist_ids, args.dry_run, dynamodb)
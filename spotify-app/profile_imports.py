@@ -0,0 +1,88 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+# Reports the Lambda cold-start import cost of each route using `python -X importtime`.
+# Each run is a fresh interpreter, so the numbers include everything a cold container imports.
+#
+#   python3 spotify-app/profile_imports.py
+#   python3 spotify-app/profile_imports.py --runs 10 --output imports.json
+#   python3 spotify-app/profile_imports.py --baseline imports.json
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# What each lambda_handler route imports before it can answer (see the lazy import in wait_search_view)
+ROUTE_IMPORTS = {
+    '/search': ['lambda_function', 'spotify_db'],
+    '/summary': ['lambda_function', 'spotify_db'],
+    '/user_data': ['lambda_function'],
+    '/get_recommendations': ['lambda_function']
+}
+
+
+def parse_importtime(stderr):
+    # Lines look like "import time:  self [us] | cumulative | <indent>module"
+    top_level_us, self_by_package = 0, defaultdict(int)
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        module = name.strip()
+        if not name[1:].startswith(' '):
+            top_level_us += int(cumulative_us)
+        self_by_package[module.split('.')[0]] += int(self_us)
+    return top_level_us, self_by_package
+
+
+def profile_route(modules, runs):
+    code = '; '.join(f'import {module}' for module in modules)
+    totals, packages = [], defaultdict(list)
+    for _ in range(runs):
+        result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=APP_DIR,
+                                capture_output=True, text=True, check=True)
+        total_us, self_by_package = parse_importtime(result.stderr)
+        totals.append(total_us)
+        for package, self_us in self_by_package.items():
+            packages[package].append(self_us)
+
+    return {
+        'total_ms': statistics.median(totals) / 1000,
+        'packages_ms': {package: statistics.median(values) / 1000 for package, values in packages.items()}
+    }
+
+
+def print_report(report, baseline=None, top=8):
+    for route, stats in report.items():
+        line = f"profile_imports: {route:<22} {stats['total_ms']:8.1f} ms"
+        if baseline and route in baseline:
+            line += f"  ({stats['total_ms'] - baseline[route]['total_ms']:+.1f} ms vs baseline)"
+        print(line)
+        heaviest = sorted(stats['packages_ms'].items(), key=lambda item: item[1], reverse=True)[:top]
+        print("    " + ", ".join(f"{package} {ms:.1f}" for package, ms in heaviest))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-route cold-start import cost of the Lambda handler")
+    parser.add_argument("--route", action="append", dest="routes", choices=sorted(ROUTE_IMPORTS))
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters per route (median is reported)")
+    parser.add_argument("--top", type=int, default=8, help="heaviest packages to list per route")
+    parser.add_argument("--output", help="write the report as JSON")
+    parser.add_argument("--baseline", help="JSON report from an earlier run to compare against")
+    args = parser.parse_args()
+
+    report = {route: profile_route(ROUTE_IMPORTS[route], args.runs) for route in args.routes or ROUTE_IMPORTS}
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    print_report(report, baseline, args.top)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
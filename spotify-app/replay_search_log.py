@@ -0,0 +1,89 @@
+import argparse
+import random
+import uuid
+
+from benchmark_batch_writer import dynamodb_backend
+from spotify_db import ArtistResolver, normalize_artist_query
+
+# Replays a search log through ArtistResolver and counts the Spotify artist searches it leaves,
+# i.e. upstream calls per 1,000 searches with and without the resolution cache. The log is a text
+# file with one query per line, or a synthetic one: Zipf-distributed over --artists artists with
+# mixed casing and spacing. --cold-every starts a fresh resolver (a cold Lambda container, so an
+# empty in-memory LRU) every N queries; the DynamoDB table is shared throughout. Runs against
+# moto by default, or a real endpoint with --endpoint-url (a temporary table is created).
+#
+#   python3 spotify-app/replay_search_log.py
+#   python3 spotify-app/replay_search_log.py --queries 10000 --artists 2000 --cold-every 50
+#   python3 spotify-app/replay_search_log.py --log searches.txt
+
+
+def synthetic_log(queries, artists, zipf_s, seed):
+    rng = random.Random(seed)
+    names = [f'Artist {i}' for i in range(artists)]
+    weights = [1 / (rank + 1) ** zipf_s for rank in range(artists)]
+    log = []
+    for name in rng.choices(names, weights, k=queries):
+        log.append(rng.choice([name, name.lower(), name.upper(), f'  {name} ', name.replace(' ', '  ')]))
+    return log
+
+
+def create_search_table(client):
+    table_name = f'replay-{uuid.uuid4().hex[:8]}'
+    client.create_table(
+        TableName=table_name,
+        KeySchema=[{'AttributeName': 'query', 'KeyType': 'HASH'}],
+        AttributeDefinitions=[{'AttributeName': 'query', 'AttributeType': 'S'}],
+        BillingMode='PAY_PER_REQUEST'
+    )
+    client.get_waiter('table_exists').wait(TableName=table_name)
+    return table_name
+
+
+def replay(log, client, table_name, cold_every):
+    upstream, resolver = 0, None
+    stats = {'memory_hits': 0, 'table_hits': 0, 'misses': 0}
+    for i, query in enumerate(log):
+        if resolver is None or (cold_every and i % cold_every == 0):
+            if resolver is not None:
+                stats = {key: stats[key] + value for key, value in resolver.stats.items()}
+            resolver = ArtistResolver(table_name=table_name, client=client)
+
+        query_key = normalize_artist_query(query)
+        if resolver.resolve(query_key) is None:
+            # What search_artist does on a miss: ask Spotify, then remember the answer
+            upstream += 1
+            resolver.remember(query_key, {'id': query_key, 'name': query_key, 'followers': {'total': 0},
+                                          'popularity': 0, 'genres': []})
+
+    stats = {key: stats[key] + value for key, value in resolver.stats.items()}
+    return upstream, stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Upstream Spotify searches per 1,000 queries with the resolution cache")
+    parser.add_argument("--log", help="file with one search query per line (default: a synthetic log)")
+    parser.add_argument("--queries", type=int, default=1000, help="length of the synthetic log")
+    parser.add_argument("--artists", type=int, default=300, help="distinct artists in the synthetic log")
+    parser.add_argument("--zipf", type=float, default=1.0, help="Zipf exponent of artist popularity")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--cold-every", type=int, default=100, help="queries per container (0: one warm container)")
+    parser.add_argument("--endpoint-url", help="DynamoDB endpoint to use instead of moto")
+    args = parser.parse_args()
+
+    if args.log:
+        with open(args.log) as f:
+            log = [line.strip() for line in f if line.strip()]
+    else:
+        log = synthetic_log(args.queries, args.artists, args.zipf, args.seed)
+
+    with dynamodb_backend(args.endpoint_url) as client:
+        table_name = create_search_table(client)
+        try:
+            upstream, stats = replay(log, client, table_name, args.cold_every)
+        finally:
+            client.delete_table(TableName=table_name)
+
+    per_thousand = upstream * 1000 / len(log)
+    print(f"replay_search_log: {len(log)} queries, {len({normalize_artist_query(q) for q in log})} distinct artists")
+    print(f"replay_search_log: {upstream} upstream searches instead of {len(log)} "
+          f"({per_thousand:.0f} per 1,000, {1000 - per_thousand:.0f} saved), {stats}")
@@ -0,0 +1,150 @@
+import asyncio
+import math
+import random
+import threading
+import time
+import weakref
+from datetime import timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+import aiohttp
+
+
+def parse_retry_after(value):
+    # Retry-After is either a number of seconds or an HTTP-date; None if missing or unparseable
+    if value is None:
+        return None
+    try:
+        seconds = float(value)
+        return max(0.0, seconds) if math.isfinite(seconds) else None
+    except ValueError:
+        pass
+    try:
+        date = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=timezone.utc)
+    return max(0.0, date.timestamp() - time.time())
+
+
+class SpotifyAPIError(Exception):
+    def __init__(self, status, message, retry_after=None):
+        super().__init__(f"Spotify API error {status}: {message}")
+        self.status = status
+        self.message = message
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        # `rate` tokens are added per second, up to `capacity` for short bursts
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self.blocked_until = 0.0
+        # Clients on different threads (e.g. Streamlit sessions) share one bucket
+        self.lock = threading.Lock()
+
+    def pause(self, seconds):
+        # After a 429 every caller waits, not just the one that was throttled
+        with self.lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+    async def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                if now < self.blocked_until:
+                    wait = self.blocked_until - now
+                else:
+                    self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                    self.updated_at = now
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.rate
+            await asyncio.sleep(wait)
+
+
+class RequestScheduler:
+    def __init__(self, rate=25, burst=50, max_retries=4, backoff_base=0.5, backoff_max=30,
+                 default_concurrency=8, endpoint_concurrency=None):
+        self.bucket = TokenBucket(rate, burst)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.default_concurrency = default_concurrency
+        self.endpoint_concurrency = endpoint_concurrency or {"audio-features": 4}
+
+        # Semaphores belong to the loop they were first used on. The scheduler is shared by every
+        # client in the process (see spotify_api.request_scheduler), so each loop gets its own set.
+        self.semaphores = weakref.WeakKeyDictionary()
+
+        self.stats = {"requests": 0, "retries": 0, "throttled": 0}
+
+    def endpoint_for(self, url):
+        # "/v1/albums/<id>/tracks" -> "albums/{id}/tracks", "/v1/audio-features" -> "audio-features"
+        segments = [segment for segment in urlparse(url).path.split("/") if segment]
+        if segments and segments[0] == "v1":
+            segments = segments[1:]
+        if len(segments) >= 3 and segments[0] in ("albums", "artists", "tracks", "playlists", "users"):
+            segments[1] = "{id}"
+        return "/".join(segments)
+
+    def get_semaphore(self, endpoint):
+        semaphores = self.semaphores.setdefault(asyncio.get_running_loop(), {})
+        if endpoint not in semaphores:
+            limit = self.endpoint_concurrency.get(endpoint, self.default_concurrency)
+            semaphores[endpoint] = asyncio.Semaphore(limit)
+        return semaphores[endpoint]
+
+    def backoff(self, attempt):
+        # Exponential backoff with full jitter
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    async def request(self, session, method, url, **kwargs):
+        endpoint = self.endpoint_for(url)
+        semaphore = self.get_semaphore(endpoint)
+
+        for attempt in range(self.max_retries + 1):
+            async with semaphore:
+                await self.bucket.acquire()
+                self.stats["requests"] += 1
+                try:
+                    async with session.request(method, url, **kwargs) as response:
+                        if response.status < 400:
+                            return await response.json()
+
+                        message = await response.text()
+                        retry_after = response.headers.get("Retry-After")
+                        status = response.status
+                except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                    if attempt == self.max_retries:
+                        raise
+                    print(f"request_scheduler: {endpoint} connection error ({e!r}), retrying")
+                    status = None
+
+            if status is None:
+                self.stats["retries"] += 1
+                await asyncio.sleep(self.backoff(attempt))
+            elif status == 429:
+                self.stats["throttled"] += 1
+                wait = parse_retry_after(retry_after)
+                if wait is None:
+                    wait = self.backoff(attempt)
+                if attempt == self.max_retries:
+                    raise SpotifyAPIError(status, message, retry_after=wait)
+                # Honor Retry-After for everyone, plus a little jitter so callers don't resume in lockstep
+                wait += random.uniform(0, self.backoff_base)
+                self.bucket.pause(wait)
+                self.stats["retries"] += 1
+                print(f"request_scheduler: {endpoint} throttled, retrying in {wait:.2f} seconds")
+                await asyncio.sleep(wait)
+            elif status >= 500 and attempt < self.max_retries:
+                self.stats["retries"] += 1
+                await asyncio.sleep(self.backoff(attempt))
+            else:
+                raise SpotifyAPIError(status, message, retry_after=parse_retry_after(retry_after))
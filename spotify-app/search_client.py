@@ -0,0 +1,158 @@
+import asyncio
+import json
+import random
+import threading
+import time
+import weakref
+from collections import OrderedDict
+
+import aiohttp
+
+from request_scheduler import parse_retry_after
+from search_encoding import decode_search_response
+
+# Retried with backoff; anything else (e.g. 404 for an unknown artist) fails straight away
+RETRYABLE_STATUSES = (429, 500, 502, 503, 504)
+
+
+class SearchError(Exception):
+    def __init__(self, status_code, message=None):
+        super().__init__(message or f"Search failed with status {status_code}")
+        self.status_code = status_code
+
+
+def shutdown_loop(loop, state):
+    # Closes the pooled session on the client's own loop, then stops the loop's thread
+    async def close_session():
+        if state.get('session') is not None:
+            await state['session'].close()
+
+    if loop.is_running():
+        asyncio.run_coroutine_threadsafe(close_session(), loop).add_done_callback(
+            lambda _: loop.call_soon_threadsafe(loop.stop))
+
+
+class SearchClient:
+    def __init__(self, base_url, search_format='json', attempt_timeout=35, deadline=90, backoff_base=0.5,
+                 backoff_max=4, pool_size=4):
+        # One per Streamlit session. Script reruns come in on different threads, so the client keeps
+        # its own event loop running on a background thread and every search is scheduled onto it;
+        # the aiohttp session (and its keep-alive connections) lives as long as the client.
+        self.base_url = base_url
+        self.search_format = search_format
+        # API Gateway answers 504 after 30 s, so an attempt waits a little longer than that and the
+        # deadline leaves room for at least one retry after a timed-out attempt
+        self.attempt_timeout = attempt_timeout
+        self.deadline = deadline
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.pool_size = pool_size
+
+        self.loop = asyncio.new_event_loop()
+        self.state = {'session': None}
+        threading.Thread(target=self.loop.run_forever, daemon=True).start()
+        # Streamlit has no session-end hook; the loop goes away once the session state drops the client
+        weakref.finalize(self, shutdown_loop, self.loop, self.state)
+
+        self.inflight = {}
+        self.progress = {}
+
+    def get_session(self):
+        if self.state['session'] is None:
+            connector = aiohttp.TCPConnector(limit=self.pool_size, keepalive_timeout=60)
+            self.state['session'] = aiohttp.ClientSession(connector=connector)
+        return self.state['session']
+
+    def submit(self, artist_key, route='search'):
+        # Returns a concurrent.futures.Future for `route`: 'search' for the per-track data, 'summary'
+        # for the aggregates. The same request, in flight or already answered, is joined, so a
+        # prefetched result isn't fetched again. Requests for any other artist are dropped
+        # (cancelled if still running), since their results would never be shown; failed ones
+        # are dropped so they can be retried.
+        for (current_route, current_key), future in list(self.inflight.items()):
+            failed = future.cancelled() or (future.done() and future.exception() is not None)
+            if failed or current_key != artist_key:
+                if not future.done():
+                    print(f"search_client: Cancelling stale {current_route} request for '{current_key}'")
+                    future.cancel()
+                del self.inflight[(current_route, current_key)]
+
+        if (route, artist_key) in self.inflight:
+            return self.inflight[(route, artist_key)]
+
+        self.progress[(route, artist_key)] = "Searching..."
+        future = asyncio.run_coroutine_threadsafe(self.fetch(route, artist_key), self.loop)
+        self.inflight[(route, artist_key)] = future
+        return future
+
+    def backoff(self, attempt, retry_after=None):
+        retry_after = parse_retry_after(retry_after)
+        if retry_after is not None:
+            return retry_after + random.uniform(0, self.backoff_base)
+        # Exponential backoff with full jitter
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    async def fetch(self, route, artist_key):
+        params = {'artist': artist_key, 'format': self.search_format} if route == 'search' else {'artist': artist_key}
+        deadline = time.monotonic() + self.deadline
+        attempt = 0
+
+        try:
+            while True:
+                remaining = deadline - time.monotonic()
+                retry_after = None
+                try:
+                    timeout = aiohttp.ClientTimeout(total=min(self.attempt_timeout, remaining))
+                    async with self.get_session().get(self.base_url + route, params=params, timeout=timeout) as response:
+                        if response.status == 200:
+                            self.progress[(route, artist_key)] = "Loading the discography..."
+                            content = await response.read()
+                            if route == 'search':
+                                return decode_search_response(content, response.headers)
+                            return json.loads(content)
+                        status = response.status
+                        retry_after = response.headers.get("Retry-After")
+                except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                    print(f"search_client: {route} request for '{artist_key}' failed ({e!r})")
+                    status = None
+
+                if status is not None and status not in RETRYABLE_STATUSES:
+                    raise SearchError(status)
+
+                delay = self.backoff(attempt, retry_after)
+                if time.monotonic() + delay >= deadline:
+                    raise SearchError(status or 504, f"Search gave up after {attempt + 1} attempts")
+
+                attempt += 1
+                # New artists are ingested on the first search, which can take a while
+                self.progress[(route, artist_key)] = f"Still working on it, retrying in {delay:.1f}s (attempt {attempt + 1})..."
+                await asyncio.sleep(delay)
+        finally:
+            self.progress.pop((route, artist_key), None)
+
+
+class SearchResultCache:
+    def __init__(self, ttl=3600, max_entries=32):
+        # Decoded responses keyed by (route, artist), shared by every session in the Streamlit process
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            cached = self.entries.get(key)
+            if cached is None:
+                return None
+            if time.monotonic() >= cached[0]:
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return cached[1]
+
+    def put(self, key, result):
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.ttl, result)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
@@ -0,0 +1,108 @@
+import base64
+import gzip
+import io
+import json
+
+# Wire formats for the /search response, picked by the client with `?format=`:
+#   json    - legacy: {"df": df.to_json(), "radar_chart": "<json>"}, i.e. JSON strings inside JSON
+#   split   - one JSON document: {"df": {"columns": [...], "data": [[...], ...]}, "radar_chart": {...}}
+#   records - one JSON document: {"df": [{column: value, ...}, ...], "radar_chart": {...}}
+#   arrow   - Arrow IPC stream with the radar chart in the schema metadata (needs pyarrow)
+# Bodies are gzipped when the client sends Accept-Encoding: gzip and the body is worth compressing.
+# The X-Search-Format header says which format was actually sent, so a Lambda without pyarrow
+# can answer an arrow request with split.
+SEARCH_FORMATS = ('json', 'split', 'records', 'arrow')
+DEFAULT_SEARCH_FORMAT = 'json'
+ARROW_CONTENT_TYPE = 'application/vnd.apache.arrow.stream'
+COMPRESS_MIN_BYTES = 1024
+
+
+def encode_arrow(df, radar_chart):
+    import pyarrow as pa
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}), b'radar_chart': radar_chart.encode('utf-8')})
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue()
+
+
+def encode_search_body(df, radar_chart, response_format):
+    # Returns (format actually used, body bytes)
+    if response_format == 'arrow':
+        try:
+            return 'arrow', encode_arrow(df, radar_chart)
+        except ImportError:
+            print("search_encoding: pyarrow not installed, sending split instead of arrow")
+            response_format = 'split'
+
+    if response_format in ('split', 'records'):
+        # radar_chart is already JSON and pandas writes the frame straight to JSON, so the
+        # document is spliced together instead of being parsed and dumped again
+        index_kwargs = {'index': False} if response_format == 'split' else {}
+        df_json = df.to_json(orient=response_format, **index_kwargs)
+        return response_format, ('{"df":' + df_json + ',"radar_chart":' + radar_chart + '}').encode('utf-8')
+
+    return 'json', json.dumps({"df": df.to_json(), "radar_chart": radar_chart}).encode('utf-8')
+
+
+def proxy_response(body, headers, accept_encoding='', binary=False):
+    # Lambda proxy response for `body` (bytes), gzipped when the client accepts it and it's worth it.
+    # Binary and gzipped bodies have to go through API Gateway base64-encoded.
+    if 'gzip' in (accept_encoding or '') and len(body) >= COMPRESS_MIN_BYTES:
+        body = gzip.compress(body, compresslevel=6)
+        headers = {**headers, "Content-Encoding": "gzip"}
+
+    if binary or "Content-Encoding" in headers:
+        return {"statusCode": 200, "headers": headers, "isBase64Encoded": True,
+                "body": base64.b64encode(body).decode('ascii')}
+    return {"statusCode": 200, "headers": headers, "body": body.decode('utf-8')}
+
+
+def encode_search_response(df, radar_chart, response_format=DEFAULT_SEARCH_FORMAT, accept_encoding=''):
+    # Lambda proxy response for a search result
+    response_format, body = encode_search_body(df, radar_chart, response_format)
+    headers = {
+        "Content-Type": ARROW_CONTENT_TYPE if response_format == 'arrow' else "application/json",
+        "X-Search-Format": response_format
+    }
+    return proxy_response(body, headers, accept_encoding, binary=response_format == 'arrow')
+
+
+def encode_summary_response(summary, accept_encoding=''):
+    # Lambda proxy response for /summary. The stored summary also holds per-feature and per-album
+    # stats; only what the page draws is sent.
+    page_summary = {
+        'artist': summary['artist'],
+        'radar_chart': summary['radar_chart'],
+        'sample_tracks': summary['sample_tracks'],
+        'albums': [{'image': album.get('image')} for album in summary['albums']],
+        'top_tracks': summary['top_tracks'],
+        'bottom_tracks': summary['bottom_tracks']
+    }
+    body = json.dumps(page_summary).encode('utf-8')
+    return proxy_response(body, {"Content-Type": "application/json"}, accept_encoding)
+
+
+def decode_search_response(content, headers):
+    # Client side: `content` is the (already decompressed) response body, `headers` the response headers.
+    # Returns (df, radar_chart_df).
+    import pandas as pd
+
+    response_format = headers.get('X-Search-Format', 'json')
+
+    if response_format == 'arrow':
+        import pyarrow as pa
+
+        table = pa.ipc.open_stream(content).read_all()
+        radar_chart = json.loads(table.schema.metadata[b'radar_chart'])
+        return table.to_pandas(), pd.DataFrame(radar_chart)
+
+    data = json.loads(content)
+    if response_format == 'split':
+        return pd.DataFrame(data['df']['data'], columns=data['df']['columns']), pd.DataFrame(data['radar_chart'])
+    if response_format == 'records':
+        return pd.DataFrame.from_records(data['df']), pd.DataFrame(data['radar_chart'])
+
+    return pd.read_json(io.StringIO(data['df'])), pd.read_json(io.StringIO(data['radar_chart']))
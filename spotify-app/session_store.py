@@ -0,0 +1,89 @@
+import json
+import os
+import secrets
+import sqlite3
+import tempfile
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from contextlib import closing
+
+# Short-lived hand-off of the /user_data payload from Flask (main.py) to Streamlit. Flask stores
+# the payload and redirects with an opaque token; Streamlit looks the token up. The two run as
+# separate processes (run.sh), so entries are written through to a SQLite file both can open;
+# with path=None the store is in-memory only, which only works within a single process.
+# Payloads are stored zlib-compressed JSON and dropped after `ttl` seconds.
+DEFAULT_PATH = os.path.join(tempfile.gettempdir(), 'spotify-app-sessions.sqlite3')
+
+
+class SessionStore:
+    def __init__(self, path=DEFAULT_PATH, ttl=900, max_memory_entries=256):
+        self.path = path
+        self.ttl = ttl
+        self.max_memory_entries = max_memory_entries
+        self.memory = OrderedDict()
+        self.lock = threading.Lock()
+
+        if self.path:
+            with closing(self.connect()) as conn, conn:
+                conn.execute('PRAGMA journal_mode=WAL')
+                conn.execute('CREATE TABLE IF NOT EXISTS sessions '
+                             '(token TEXT PRIMARY KEY, payload BLOB NOT NULL, expires_at REAL NOT NULL)')
+
+    def connect(self):
+        # One short-lived connection per call: Flask and Streamlit both serve requests from several threads
+        return sqlite3.connect(self.path, timeout=5)
+
+    def remember_in_memory(self, token, expires_at, blob):
+        with self.lock:
+            self.memory[token] = (expires_at, blob)
+            self.memory.move_to_end(token)
+            while len(self.memory) > self.max_memory_entries:
+                self.memory.popitem(last=False)
+
+    def put(self, payload):
+        token = secrets.token_urlsafe(24)
+        expires_at = time.time() + self.ttl
+        blob = zlib.compress(json.dumps(payload, separators=(',', ':')).encode('utf-8'))
+
+        self.remember_in_memory(token, expires_at, blob)
+        if self.path:
+            with closing(self.connect()) as conn, conn:
+                conn.execute('INSERT INTO sessions (token, payload, expires_at) VALUES (?, ?, ?)',
+                             (token, blob, expires_at))
+                # Writes are rare (one per login), so they also sweep out expired sessions
+                conn.execute('DELETE FROM sessions WHERE expires_at < ?', (time.time(),))
+        return token
+
+    def get(self, token):
+        # Returns the payload, or None if the token is unknown or has expired
+        with self.lock:
+            cached = self.memory.get(token)
+
+        if cached is None and self.path:
+            with closing(self.connect()) as conn:
+                row = conn.execute('SELECT expires_at, payload FROM sessions WHERE token = ?', (token,)).fetchone()
+            if row is not None:
+                cached = (row[0], row[1])
+                self.remember_in_memory(token, *cached)
+
+        if cached is None:
+            return None
+        if time.time() >= cached[0]:
+            self.delete(token)
+            return None
+        return json.loads(zlib.decompress(cached[1]))
+
+    def delete(self, token):
+        with self.lock:
+            self.memory.pop(token, None)
+        if self.path:
+            with closing(self.connect()) as conn, conn:
+                conn.execute('DELETE FROM sessions WHERE token = ?', (token,))
+
+
+session_store = SessionStore(
+    path=os.environ.get('SESSION_STORE_PATH', DEFAULT_PATH) or None,
+    ttl=int(os.environ.get('SESSION_STORE_TTL', 900))
+)
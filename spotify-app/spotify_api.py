@@ -1,240 +1,516 @@
 import asyncio
 import aiohttp
 import os
-import requests
 import json
 import base64
 from collections import Counter
 import itertools
 import time
+from request_scheduler import RequestScheduler, SpotifyAPIError
+
+class TokenProvider:
+    def __init__(self, refresh_margin=60):
+        # Client-credentials tokens keyed by client id, shared by every SpotifyAPI instance
+        # in the process (and so across warm Lambda invocations)
+        self.refresh_margin = refresh_margin
+        self.tokens = {}
+        self.locks = {}
+        self.locks_loop = None
+
+    def get_lock(self, client_id):
+        loop = asyncio.get_running_loop()
+        if self.locks_loop is not loop:
+            self.locks = {}
+            self.locks_loop = loop
+        if client_id not in self.locks:
+            self.locks[client_id] = asyncio.Lock()
+        return self.locks[client_id]
+
+    def get_cached_token(self, client_id):
+        cached = self.tokens.get(client_id)
+        # Refresh a little before expiry so no request goes out with a token about to die
+        if cached and time.time() < cached["expires_at"] - self.refresh_margin:
+            return cached["access_token"]
+        return None
+
+    async def get_token(self, spotify_api):
+        token = self.get_cached_token(spotify_api.client_id)
+        if token:
+            return token
+
+        # Single flight: concurrent callers wait on one refresh instead of each fetching a token
+        async with self.get_lock(spotify_api.client_id):
+            token = self.get_cached_token(spotify_api.client_id)
+            if token:
+                return token
+
+            start_time = time.time()
+            json_result = await spotify_api.fetch_token()
+            self.tokens[spotify_api.client_id] = {
+                "access_token": json_result["access_token"],
+                "expires_at": start_time + json_result.get("expires_in", 3600)
+            }
+            print("spotify_api: Fetched new client credentials token")
+            return json_result["access_token"]
+
+    def invalidate(self, client_id, token):
+        cached = self.tokens.get(client_id)
+        if cached and cached["access_token"] == token:
+            del self.tokens[client_id]
+
+token_provider = TokenProvider()
+
+# Shared like token_provider, so rate limiting and 429 pauses apply to every client in the process
+request_scheduler = RequestScheduler()
 
 class SpotifyAPI:
-    def __init__(self):
+    def __init__(self, pool_size=100, pool_size_per_host=0, keepalive_timeout=30, dns_cache_ttl=300, scheduler=None):
         self.client_id = os.environ['CLIENT_ID']
         self.client_secret = os.environ['CLIENT_SECRET']
         self.base_url = "https://api.spotify.com/v1/"
-        self.token = None
+        self.token_url = "https://accounts.spotify.com/api/token"
+        self.token_provider = token_provider
+
+        # Connection pool settings for the shared aiohttp session
+        self.pool_size = pool_size
+        self.pool_size_per_host = pool_size_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.dns_cache_ttl = dns_cache_ttl
+        self.session = None
+        self.session_loop = None
+
+        # Every API call goes through the scheduler for rate limiting and 429/5xx retries
+        self.scheduler = scheduler or request_scheduler
+
+    async def __aenter__(self):
+        await self.get_session()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def get_session(self):
+        # One pooled session per event loop, reused across calls and warm Lambda invocations.
+        # A session bound to a different loop cannot be used from this one, so it is replaced.
+        loop = asyncio.get_running_loop()
+        if self.session is None or self.session.closed or self.session_loop is not loop:
+            if self.session is not None and not self.session.closed:
+                # Left over from another loop: close it so its connector isn't leaked
+                try:
+                    await self.session.close()
+                except Exception as e:
+                    print(f"spotify_api: Error closing the previous session: {e!r}")
+            connector = aiohttp.TCPConnector(
+                limit=self.pool_size,
+                limit_per_host=self.pool_size_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+                use_dns_cache=True,
+                ttl_dns_cache=self.dns_cache_ttl
+            )
+            self.session = aiohttp.ClientSession(connector=connector)
+            self.session_loop = loop
+        return self.session
+
+    async def close(self):
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
+        self.session = None
+        self.session_loop = None
     
     async def get_token(self):
-        if self.token:
-            return self.token
-        
+        return await self.token_provider.get_token(self)
+
+    async def fetch_token(self):
         auth_string = f"{self.client_id}:{self.client_secret}"
         auth_bytes = auth_string.encode("utf-8")
         auth_base64 = str(base64.b64encode(auth_bytes), "utf-8")
 
-        url = "https://accounts.spotify.com/api/token"
+        url = self.token_url
         headers = {
             "Authorization": "Basic " + auth_base64,
             "Content-Type": "application/x-www-form-urlencoded"
         }
         data = {"grant_type": "client_credentials"}
         
-        async with aiohttp.ClientSession() as session:
-            async with session.post(url, headers=headers, data=data) as response:
-                json_result = await response.json()
-                self.token = json_result["access_token"]
-                return self.token
+        return await self.request("POST", url, auth=False, headers=headers, data=data)
     
     async def get_auth_header(self):
         token = await self.get_token()
         return {"Authorization": "Bearer " + token}
 
+    async def request(self, method, url, auth=True, headers=None, **kwargs):
+        session = await self.get_session()
+        # Calls made with a caller-supplied (user) Authorization header skip the client token
+        if not auth or (headers and "Authorization" in headers):
+            return await self.scheduler.request(session, method, url, headers=headers, **kwargs)
+
+        auth_header = await self.get_auth_header()
+        try:
+            return await self.scheduler.request(session, method, url, headers={**(headers or {}), **auth_header}, **kwargs)
+        except SpotifyAPIError as e:
+            if e.status != 401:
+                raise
+            # Token was revoked or expired early; drop it and retry once with a fresh one
+            self.token_provider.invalidate(self.client_id, auth_header["Authorization"][len("Bearer "):])
+            auth_header = await self.get_auth_header()
+            return await self.scheduler.request(session, method, url, headers={**(headers or {}), **auth_header}, **kwargs)
+
+    async def get_json(self, url, params=None, headers=None):
+        return await self.request("GET", url, params=params, headers=headers)
+
+    async def paginate(self, url, params=None, limit=50, key=None, max_concurrency=4):
+        # Yields every item of a paged list endpoint, in order. `key` selects the paging
+        # object for endpoints that nest it (e.g. "artists" for search results).
+        params = dict(params or {})
+        params["limit"] = limit
+
+        first_page = await self.get_json(url, params={**params, "offset": 0})
+        if key:
+            first_page = first_page.get(key, {})
+        for item in first_page.get("items", []):
+            yield item
+
+        if not first_page.get("next"):
+            return
+
+        total = first_page.get("total")
+        if total is None:
+            # No total to plan with, so follow the next links one by one
+            next_url = first_page["next"]
+            while next_url:
+                page = await self.get_json(next_url)
+                if key:
+                    page = page.get(key, {})
+                for item in page.get("items", []):
+                    yield item
+                next_url = page.get("next")
+            return
+
+        # Once total is known every remaining offset can be requested at the same time
+        page_size = first_page.get("limit") or limit
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def fetch_page(offset):
+            async with semaphore:
+                page = await self.get_json(url, params={**params, "limit": page_size, "offset": offset})
+                return page.get(key, {}) if key else page
+
+        tasks = [asyncio.ensure_future(fetch_page(offset)) for offset in range(page_size, total, page_size)]
+        try:
+            for task in tasks:
+                page = await task
+                for item in page.get("items", []):
+                    yield item
+        finally:
+            for task in tasks:
+                task.cancel()
+
     async def search_for_artist(self, artist_name):
         start_time = time.time()
         url = self.base_url + "search"
-        headers = await self.get_auth_header()
-        query = f"?q={artist_name}&type=artist&limit=1"
-        query_url = url + query
-        
-        async with aiohttp.ClientSession() as session:
-            async with session.get(query_url, headers=headers) as response:
-                json_result = await response.json()
-                artists = json_result.get("artists", {}).get("items", [])
-                if not artists:
-                    print("No artist with this name exists...")
-                    return None
-                search_time = time.time() - start_time  # Calculate elapsed time
-                print(f"spotify_api: Time taken to search for artist: {search_time} seconds")
-                return artists[0]
+        params = {"q": artist_name, "type": "artist", "limit": 1}
+
+        json_result = await self.get_json(url, params=params)
+        artists = json_result.get("artists", {}).get("items", [])
+        if not artists:
+            print("No artist with this name exists...")
+            return None
+        search_time = time.time() - start_time  # Calculate elapsed time
+        print(f"spotify_api: Time taken to search for artist: {search_time} seconds")
+        return artists[0]
 
     async def get_track_features_batch(self, track_ids):
         url = self.base_url + "audio-features"
-        headers = await self.get_auth_header()
         params = {'ids': ','.join(track_ids)}
-        
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, headers=headers, params=params) as response:
-                json_result = await response.json()
-                return json_result["audio_features"]
 
-    async def get_album_tracks_with_audio_features(self, album_id):
+        json_result = await self.get_json(url, params=params)
+        return json_result["audio_features"]
+
+    async def get_track_features(self, track_ids, batch_size=100, max_concurrency=8):
+        # The audio-features endpoint takes up to 100 ids per call, so ids from any
+        # number of albums are packed into full chunks and fetched concurrently
+        semaphore = asyncio.Semaphore(max_concurrency)
+        chunks = [track_ids[i:i + batch_size] for i in range(0, len(track_ids), batch_size)]
+
+        async def fetch_chunk(chunk):
+            async with semaphore:
+                return await self.get_track_features_batch(chunk)
+
+        chunk_results = await asyncio.gather(*(fetch_chunk(chunk) for chunk in chunks), return_exceptions=True)
+
+        features_by_id = {}
+        for chunk, chunk_features in zip(chunks, chunk_results):
+            if isinstance(chunk_features, Exception):
+                print(f"spotify_api: Failed to get audio features for {len(chunk)} tracks: {chunk_features!r}")
+                continue
+            for track_id, features in zip(chunk, chunk_features):
+                features_by_id[track_id] = features
+        return features_by_id
+
+    async def get_album_tracks(self, album_id):
         url = self.base_url + f"albums/{album_id}/tracks"
-        headers = await self.get_auth_header()
-        
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, headers=headers) as response:
-                json_result = await response.json()
-                track_ids = [track["id"] for track in json_result.get("items", [])]
-                track_features = await self.get_track_features_batch(track_ids)
-                tracks_info = []
-                for track, features in zip(json_result.get("items", []), track_features):
-                    tracks_dict = {
-                        "track_name": track["name"],
-                        "track_id": track["id"],
-                        "track_number": track["track_number"],
-                        "artists": track["artists"]
-                    }
-                    if features is not None:
-                        tracks_dict.update(features)
-                        tracks_info.append(tracks_dict)
-                return tracks_info
-
-    async def get_discography_with_features(self, artist_id):
-        start_time = time.time()
+        return [track async for track in self.paginate(url)]
+
+    async def get_artist_albums(self, artist_id):
         url = self.base_url + f"artists/{artist_id}/albums"
-        headers = await self.get_auth_header()
-        
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, headers=headers) as response:
-                json_result = await response.json()
-                discography_with_features = []
-                for album in json_result.get("items", []):
-                    album_id = album["id"]
-                    album_name = album["name"]
-                    album_type = album['album_type']
-                    total_tracks = album['total_tracks']
-                    available_markets = album['available_markets']
-                    images = album["images"]
-                    artists = album["artists"]
-                    album_tracks_with_features = await self.get_album_tracks_with_audio_features(album["id"])
-                    print("spotify_api.py: Trying to get album tracks with features:", album_tracks_with_features)
-                    discography_with_features.append({
-                        "album_id": album_id,
-                        "album_name": album_name,
-                        "album_type": album_type,
-                        "total_tracks": total_tracks,
-                        "available_markets": available_markets,
-                        "images": images,
-                        "artists": artists,
-                        "tracks": album_tracks_with_features
-                    })
-                get_discography_time = time.time() - start_time  # Calculate elapsed time
-                print(f"spotify_api: Time taken to get discography's features: {get_discography_time} seconds")
-                return discography_with_features
-            
-    def get_recommendations(self, headers):
-        url = self.base_url + "recommendations"
-        top_artist_url = self.base_url + "me/top/artists?time_range=short_term&limit=5"
-
-        # Get the seeds for the top 5 artists
-        artist_response = requests.get(top_artist_url, headers=headers)
-
-        if artist_response.status_code == 200:
-            top_artists = artist_response.json()
-            id = [item['id'] for item in top_artists['items']]
-
-            # Get recommendations based off of these top 5 artists that the user is CURRENTLY listening to
-            payload = {'seed_artists': id, 'limit':8}
-            recommendations_response = requests.get(url, headers=headers, params=payload)
-
-            if recommendations_response.status_code == 200:
-                recommendations_response = recommendations_response.json()
-                resp = []
-                for track in recommendations_response["tracks"]:
-                    track_info = {
-                        "track_name": track["name"],
-                        "image_url": track["album"]["images"][1]["url"],
-                        "artists": [artist["name"] for artist in track["artists"]],
-                        "album": track["album"]["name"]
-                    }
-
-                    resp.append(track_info)
-                print(resp)
-                # return json.dumps(resp)
-
-                return resp
-
-            else:
-                error_message = {'message': 'Failed to get recommendations', 
-                                'status_code': recommendations_response.status_code,
-                                'response_error': recommendations_response.text}
-                return error_message
+        return [album async for album in self.paginate(url)]
+
+    def merge_track_features(self, tracks, features_by_id):
+        tracks_info = []
+        for track in tracks:
+            features = features_by_id.get(track["id"])
+            if features is not None:
+                tracks_dict = {
+                    "track_name": track["name"],
+                    "track_id": track["id"],
+                    "track_number": track["track_number"],
+                    "artists": track["artists"]
+                }
+                tracks_dict.update(features)
+                tracks_info.append(tracks_dict)
+        return tracks_info
+
+    async def get_album_tracks_with_audio_features(self, album_id):
+        tracks = await self.get_album_tracks(album_id)
+        features_by_id = await self.get_track_features([track["id"] for track in tracks])
+        return self.merge_track_features(tracks, features_by_id)
+
+    async def get_discography_with_features(self, artist_id, concurrent=True, max_concurrency=8):
+        start_time = time.time()
+        albums = await self.get_artist_albums(artist_id)
+
+        if concurrent:
+            # Fan out album requests, bounded so a large discography doesn't flood the pool
+            semaphore = asyncio.Semaphore(max_concurrency)
+
+            async def fetch_album_tracks(album):
+                async with semaphore:
+                    return await self.get_album_tracks(album["id"])
 
+            # gather keeps the album order; exceptions are returned instead of cancelling the rest
+            album_results = await asyncio.gather(*(fetch_album_tracks(album) for album in albums), return_exceptions=True)
         else:
-            error_message = {'message': 'Failed to get user\'s top artists ', 
-                            'status_code': artist_response.status_code,
-                            'response_error': artist_response.text}
-            return error_message
+            album_results = []
+            for album in albums:
+                try:
+                    album_results.append(await self.get_album_tracks(album["id"]))
+                except Exception as e:
+                    album_results.append(e)
 
-    def get_user_data(self, headers):
+        # Batch audio features across every album instead of one call per album
+        track_ids = [track["id"] for tracks in album_results if not isinstance(tracks, Exception) for track in tracks]
+        features_by_id = await self.get_track_features(track_ids, max_concurrency=max_concurrency if concurrent else 1)
+
+        discography_with_features = []
+        for album, album_tracks in zip(albums, album_results):
+            if isinstance(album_tracks, Exception):
+                print(f"spotify_api: Failed to get tracks for album {album['id']}: {album_tracks!r}")
+                continue
+            album_tracks_with_features = self.merge_track_features(album_tracks, features_by_id)
+            print("spotify_api.py: Trying to get album tracks with features:", album_tracks_with_features)
+            discography_with_features.append(self.album_with_features(album, album_tracks_with_features))
+        get_discography_time = time.time() - start_time  # Calculate elapsed time
+        print(f"spotify_api: Time taken to get discography's features: {get_discography_time} seconds")
+        return discography_with_features
+
+    def album_with_features(self, album, album_tracks_with_features):
+        return {
+            "album_id": album["id"],
+            "album_name": album["name"],
+            "album_type": album['album_type'],
+            "total_tracks": album['total_tracks'],
+            "available_markets": album['available_markets'],
+            "images": album["images"],
+            "artists": album["artists"],
+            "tracks": album_tracks_with_features
+        }
+
+    async def iter_discography_with_features(self, artist_id, max_concurrency=8, batch_size=100):
+        # Streaming variant of get_discography_with_features: albums are yielded (in completion
+        # order, not release order) as soon as all of their audio features have landed. Track ids
+        # are still pooled across albums so every audio-features request except the last is full.
+        start_time = time.time()
+        albums = await self.get_artist_albums(artist_id)
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def fetch_album_tracks(album):
+            async with semaphore:
+                try:
+                    return album, await self.get_album_tracks(album["id"])
+                except Exception as e:
+                    return album, e
+
+        async def fetch_features(track_ids):
+            try:
+                return track_ids, await self.get_track_features_batch(track_ids)
+            except Exception as e:
+                print(f"spotify_api: Failed to get audio features for {len(track_ids)} tracks: {e!r}")
+                return track_ids, [None] * len(track_ids)
+
+        album_tasks = [asyncio.ensure_future(fetch_album_tracks(album)) for album in albums]
+        feature_tasks = []
+        waiting_albums = []
+        unrequested_ids = []
+        features_by_id = {}
+        resolved_ids = set()
+        albums_yielded = 0
+
+        def ready_albums():
+            for task in [task for task in feature_tasks if task.done()]:
+                feature_tasks.remove(task)
+                track_ids, track_features = task.result()
+                features_by_id.update(zip(track_ids, track_features))
+                resolved_ids.update(track_ids)
+
+            ready, still_waiting = [], []
+            for entry in waiting_albums:
+                if all(track["id"] in resolved_ids for track in entry[1]):
+                    ready.append(entry)
+                else:
+                    still_waiting.append(entry)
+            waiting_albums[:] = still_waiting
+            return [self.album_with_features(album, self.merge_track_features(album_tracks, features_by_id))
+                    for album, album_tracks in ready]
+
+        try:
+            for album_task in asyncio.as_completed(album_tasks):
+                album, album_tracks = await album_task
+                if isinstance(album_tracks, Exception):
+                    print(f"spotify_api: Failed to get tracks for album {album['id']}: {album_tracks!r}")
+                    continue
+
+                waiting_albums.append((album, album_tracks))
+                unrequested_ids.extend(track["id"] for track in album_tracks)
+                while len(unrequested_ids) >= batch_size:
+                    feature_tasks.append(asyncio.ensure_future(fetch_features(unrequested_ids[:batch_size])))
+                    unrequested_ids = unrequested_ids[batch_size:]
+
+                for album_with_features in ready_albums():
+                    albums_yielded += 1
+                    yield album_with_features
+
+            if unrequested_ids:
+                feature_tasks.append(asyncio.ensure_future(fetch_features(unrequested_ids)))
+
+            while True:
+                for album_with_features in ready_albums():
+                    albums_yielded += 1
+                    yield album_with_features
+                if not feature_tasks:
+                    break
+                await asyncio.wait(feature_tasks, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in album_tasks + feature_tasks:
+                task.cancel()
+
+        get_discography_time = time.time() - start_time
+        print(f"spotify_api: Time taken to stream {albums_yielded} albums with features: {get_discography_time} seconds")
+
+    def error_message(self, message, error):
+        return {'message': message,
+                'status_code': error.status,
+                'response_error': error.message}
+
+    async def get_recommendations(self, headers, top_artists=None):
+        url = self.base_url + "recommendations"
+
+        if top_artists is None:
+            # Get the seeds for the top 5 artists
+            try:
+                top_artists = await self.get_json(self.base_url + "me/top/artists",
+                                                  params={"time_range": "short_term", "limit": 5}, headers=headers)
+            except SpotifyAPIError as e:
+                return self.error_message('Failed to get user\'s top artists ', e)
+
+        id = [item['id'] for item in top_artists['items']][:5]
+
+        # Get recommendations based off of these top 5 artists that the user is CURRENTLY listening to
+        payload = {'seed_artists': ','.join(id), 'limit': 8}
+        try:
+            recommendations_response = await self.get_json(url, params=payload, headers=headers)
+        except SpotifyAPIError as e:
+            return self.error_message('Failed to get recommendations', e)
+
+        resp = []
+        for track in recommendations_response["tracks"]:
+            track_info = {
+                "track_name": track["name"],
+                "image_url": track["album"]["images"][1]["url"],
+                "artists": [artist["name"] for artist in track["artists"]],
+                "album": track["album"]["name"]
+            }
+
+            resp.append(track_info)
+        print(resp)
+
+        return resp
+
+    async def get_user_data(self, headers):
 
         start_time = time.time()
     
         user_data = {}
 
+        async def get_top_artists_and_recommendations():
+            start_artist_time = time.time()
+            top_artists = await self.get_json(self.base_url + "me/top/artists", params={"limit": 10}, headers=headers)
+            artist_time = time.time() - start_artist_time
+            print(f"spotify_api: Time taken for obtaining top artists: {artist_time} seconds")
+
+            # The top artists double as recommendation seeds, saving a second top-artists call
+            recommendations = await self.get_recommendations(headers, top_artists)
+            return top_artists, recommendations
+
+        async def get_top_tracks():
+            start_track_time = time.time()
+            top_tracks = await self.get_json(self.base_url + "me/top/tracks", params={"limit": 10}, headers=headers)
+            tracks_time = time.time() - start_track_time
+            print(f"spotify_api: Time taken for obtaining top tracks: {tracks_time} seconds")
+            return top_tracks
+
+        # The profile, top artists (+ recommendations) and top tracks don't depend on each other
+        user, artists_result, top_tracks = await asyncio.gather(
+            self.get_json(self.base_url + "me", headers=headers),
+            get_top_artists_and_recommendations(),
+            get_top_tracks(),
+            return_exceptions=True
+        )
+
         # GET USERNAME
-        response = requests.get(self.base_url + "me", headers=headers)
-        if response.status_code == 200:
-            user = response.json()
-            user_data["username"] = user['display_name']
-        
-        else:
-            error_message = {'message': 'Failed to get user\'s data ', 
-                            'status_code': response.status_code,
-                            'response_error': response.text}
-            return error_message
+        if isinstance(user, SpotifyAPIError):
+            return self.error_message('Failed to get user\'s data ', user)
+        elif isinstance(user, Exception):
+            raise user
+        user_data["username"] = user['display_name']
 
         # GET TOP 10 ARTISTS
-        start_artist_time = time.time()
-        top_artist_url = self.base_url + "me/top/artists?limit=10"
-        artist_response = requests.get(top_artist_url, headers=headers)
+        if isinstance(artists_result, SpotifyAPIError):
+            return self.error_message('Failed to get user\'s top artists ', artists_result)
+        elif isinstance(artists_result, Exception):
+            raise artists_result
+        top_artists, recommendations = artists_result
 
-        if artist_response.status_code == 200:
-            top_artists = artist_response.json()
-            names = [item['name'] for item in top_artists['items']]
-            artist_image_urls = [item['images'][0]["url"] for item in top_artists['items']] # get the one for 160px
-            genres = [item['genres'] for item in top_artists['items']]
+        names = [item['name'] for item in top_artists['items']]
+        artist_image_urls = [item['images'][0]["url"] for item in top_artists['items']] # get the one for 160px
+        genres = [item['genres'] for item in top_artists['items']]
 
-            user_data["top_artists"] = names
-            user_data["artist_url"] = artist_image_urls
-            genres_count = Counter(list(itertools.chain(*genres)))
-            user_data["top_genres"] = [genre for genre, _ in genres_count.most_common(10)]
+        user_data["top_artists"] = names
+        user_data["artist_url"] = artist_image_urls
+        genres_count = Counter(list(itertools.chain(*genres)))
+        user_data["top_genres"] = [genre for genre, _ in genres_count.most_common(10)]
 
-            artist_time = time.time() - start_artist_time
-            print(f"spotify_api: Time taken for obtaining top artists: {artist_time} seconds")
-        
-        else:
-            error_message = {'message': 'Failed to get user\'s top artists ', 
-                            'status_code': artist_response.status_code,
-                            'response_error': artist_response.text}
-            return error_message
-        
         # GET TOP 10 TRACKS
-        start_track_time = time.time()
-        top_tracks_url = self.base_url + "me/top/tracks?limit=10"
-        tracks_response = requests.get(top_tracks_url, headers=headers)
-
-        if tracks_response.status_code == 200:
-            top_tracks = tracks_response.json()
-            track_names = [item['name'] for item in top_tracks['items']]
-            track_image_urls = [item["album"]['images'][0]["url"]for item in top_tracks['items']] # get the one for 160px
-            
-            user_data["top_tracks"] = track_names
-            user_data["track_url"] = track_image_urls
+        if isinstance(top_tracks, SpotifyAPIError):
+            return self.error_message('Failed to get user\'s top tracks ', top_tracks)
+        elif isinstance(top_tracks, Exception):
+            raise top_tracks
+        track_names = [item['name'] for item in top_tracks['items']]
+        track_image_urls = [item["album"]['images'][0]["url"]for item in top_tracks['items']] # get the one for 160px
 
-            tracks_time = time.time() - start_track_time
-            print(f"spotify_api: Time taken for obtaining top tracks: {tracks_time} seconds")
-        
-        else:
-            error_message = {'message': 'Failed to get user\'s top tracks ', 
-                            'status_code': tracks_response.status_code,
-                            'response_error': tracks_response.text}
-            return error_message
-        
-        # GET RECOMMENDATIONS
-        recommendations = self.get_recommendations(headers)
+        user_data["top_tracks"] = track_names
+        user_data["track_url"] = track_image_urls
 
+        # GET RECOMMENDATIONS
         user_data["recommendations"] = recommendations
         
         end_time = time.time() - start_time
@@ -243,6 +519,8 @@ class SpotifyAPI:
     
     # GET ARTIST'S TOP TRACKS
     def get_artist_top_tracks(self, token, artist_id, market="US"):
+        # Only this blocking helper uses requests; importing it lazily keeps it off the Lambda cold start
+        import requests
         url = f"https://api.spotify.com/v1/artists/{artist_id}/top-tracks"
         headers = self.get_auth_header(token)
         params = {"market": market}
@@ -251,7 +529,8 @@ class SpotifyAPI:
         return json_result["tracks"]
 
 async def main():
-    spotify_api = SpotifyAPI()
+    async with SpotifyAPI() as spotify_api:
+        pass
 	
 if __name__ == "__main__":
     asyncio.run(main())
@@ -1,18 +1,55 @@
 import pandas as pd
+import numpy as np
+import functools
 from spotify_api import SpotifyAPI
+from track_analytics import top_bottom_tracks
 import json
 import boto3
-import awswrangler as wr
+from boto3.dynamodb.types import TypeSerializer
+from botocore.exceptions import BotoCoreError, ClientError
+from concurrent.futures import ThreadPoolExecutor
 from decimal import Decimal
 import asyncio
-import aiohttp
+from collections import OrderedDict
+import os
+import random
 import time
+import uuid
+import zlib
+
+TABLE_NAME = 'spotidy-1nf'
+
+# Alternate layout: one header item per artist and per album, plus packed track-feature items.
+# Select it with STORAGE_LAYOUT=compact; migrate_storage_layout.py backfills it from TABLE_NAME.
+COMPACT_TABLE_NAME = 'spotidy-compact'
+STORAGE_LAYOUT = os.environ.get('STORAGE_LAYOUT', '1nf')
+
+# Built once per container so warm invocations reuse the client's connection pool.
+# reset_clients() drops it (and the writer pools) after a connection error.
+dynamodb_client = None
+batch_writers = {}
+
+
+def get_dynamodb_client():
+    global dynamodb_client
+    if dynamodb_client is None:
+        dynamodb_client = boto3.client('dynamodb')
+    return dynamodb_client
+
+
+def reset_clients():
+    global dynamodb_client
+    for writer in batch_writers.values():
+        writer.close()
+    batch_writers.clear()
+    dynamodb_client = None
 
 
 def check_artist_existence(artist_id):
-    dynamodb = boto3.client('dynamodb')
-    table_name = 'spotidy-1nf'
+    dynamodb = get_dynamodb_client()
+    table_name = COMPACT_TABLE_NAME if STORAGE_LAYOUT == 'compact' else TABLE_NAME
 
+    # Cheap yes/no probe: stop at the first key and return only a count, no item data
     query_params = {
         'TableName': table_name,
         'KeyConditionExpression': '#artist_id = :artist_id',
@@ -21,7 +58,9 @@ def check_artist_existence(artist_id):
         },
         'ExpressionAttributeValues': {
             ':artist_id': {'S': artist_id}
-        }
+        },
+        'Limit': 1,
+        'Select': 'COUNT'
     }
 
     start_time = time.time()
@@ -32,78 +71,157 @@ def check_artist_existence(artist_id):
     print(f"spotify_db.py: Time taken for checking artist's existence: {artist_time} seconds")
 
     # Check if any items were returned
-    return len(response['Items']) > 0
+    return response['Count'] > 0
 
 
-async def create_entries(artist_data, artist_id):
-    dynamodb = boto3.resource('dynamodb')
-    spotify_api = SpotifyAPI()
-    table_name = 'spotidy-1nf'
+def build_entry(artist_data, artist_id, album_info, track_info):
+    return {
+        'artist_id': artist_id,
+        'name': artist_data['name'],
+        'followers': artist_data['followers']['total'],
+        'popularity': artist_data['popularity'],
+        'genres': json.dumps(artist_data['genres']),
+
+        'album_id': album_info['album_id'],
+        'album_type': album_info['album_type'],
+        'album_name': album_info['album_name'],
+        'total_tracks': album_info['total_tracks'],
+        'available_markets': json.dumps(album_info['available_markets']),
+        'images': json.dumps(album_info["images"]),
+
+        'track_id': track_info['track_id'],
+        'track_name': track_info['track_name'],
+        'track_number': track_info['track_number'],
+        'key': track_info.get('key', None),
+        'duration_ms': track_info.get('duration_ms', None),
+        'instrumentalness': Decimal(str(track_info['instrumentalness'])) if track_info.get('instrumentalness') is not None else None,
+        'acousticness': Decimal(str(track_info['acousticness'])) if track_info.get('acousticness') is not None else None,
+        'danceability': Decimal(str(track_info['danceability'])) if track_info.get('danceability') is not None else None,
+        'energy': Decimal(str(track_info['energy'])) if track_info.get('energy') is not None else None,
+        'liveness': Decimal(str(track_info['liveness'])) if track_info.get('liveness') is not None else None,
+        'speechiness': Decimal(str(track_info['speechiness'])) if track_info.get('speechiness') is not None else None,
+        'valence': Decimal(str(track_info['valence'])) if track_info.get('valence') is not None else None,
+        'loudness': Decimal(str(track_info['loudness'])) if track_info.get('loudness') is not None else None,
+        'tempo': Decimal(str(track_info['tempo'])) if track_info.get('tempo') is not None else None,
+        'time_signature': track_info.get('time_signature', None)
+    }
+
+
+class DynamoBatchWriter:
+    def __init__(self, table_name, client=None, max_workers=4, max_retries=8, backoff_base=0.05, backoff_max=5):
+        self.table_name = table_name
+        self.client = client or get_dynamodb_client()
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.serializer = TypeSerializer()
+
+    def serialize(self, entry):
+        # Missing values are left off the item rather than stored as NULL
+        return {key: self.serializer.serialize(value) for key, value in entry.items() if value is not None}
+
+    def write_batch(self, batch):
+        # batch_write_item takes at most 25 puts; throttled ones come back as UnprocessedItems
+        requests = [{'PutRequest': {'Item': self.serialize(entry)}} for entry in batch]
+        for attempt in range(self.max_retries + 1):
+            response = self.client.batch_write_item(RequestItems={self.table_name: requests})
+            requests = response.get('UnprocessedItems', {}).get(self.table_name, [])
+            if not requests:
+                return
+            time.sleep(random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt)))
+        raise RuntimeError(f"spotify_db: {len(requests)} items still unprocessed after {self.max_retries} retries")
+
+    async def write_batch_async(self, batch):
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self.executor, self.write_batch, batch)
+
+    def write_all(self, entries, batch_size=25):
+        batches = [entries[i:i + batch_size] for i in range(0, len(entries), batch_size)]
+        for future in [self.executor.submit(self.write_batch, batch) for batch in batches]:
+            future.result()
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+
+
+def get_batch_writer(table_name, max_workers=4):
+    # Writer threads outlive the invocation and are reused by the next ingest in this container
+    writer = batch_writers.get(table_name)
+    if writer is None:
+        writer = DynamoBatchWriter(table_name, client=get_dynamodb_client(), max_workers=max_workers)
+        batch_writers[table_name] = writer
+    return writer
+
+
+async def create_entries(artist_data, artist_id, spotify_api=None, num_writers=4, max_pending_batches=8):
+    if spotify_api is None:
+        async with SpotifyAPI() as spotify_api:
+            return await create_entries(artist_data, artist_id, spotify_api, num_writers, max_pending_batches)
+
+    compact = STORAGE_LAYOUT == 'compact'
+    table_name = COMPACT_TABLE_NAME if compact else TABLE_NAME
+    batch_size = 25
 
+    # Producer/consumer: albums are turned into 25-item batches as their features arrive, and
+    # writers flush them meanwhile. The bounded queue keeps memory flat for huge catalogs.
+    queue = asyncio.Queue(maxsize=max_pending_batches)
+    writer = get_batch_writer(table_name, max_workers=num_writers)
+    collector = SummaryCollector()
+    stats = {'items': 0, 'batches': 0, 'first_write': None}
     start_time = time.time()
-    discography_with_features = await spotify_api.get_discography_with_features(artist_id)
-    spotify_track_features_time = time.time() - start_time
-    print(f"spotify_db: Time taken to get track features from Spotify: {spotify_track_features_time} seconds")
 
-    batch_requests = []
-    insert_start = time.time()
-    for album_info in discography_with_features:
-        for track_info in album_info['tracks']:
-            entry = {
-                'artist_id': artist_id,
-                'name': artist_data['name'],
-                'followers': artist_data['followers']['total'],
-                'popularity': artist_data['popularity'],
-                'genres': json.dumps(artist_data['genres']),
-
-                'album_type': album_info['album_type'],
-                'album_name': album_info['album_name'],
-                'total_tracks': album_info['total_tracks'],
-                'available_markets': json.dumps(album_info['available_markets']),
-                'images': json.dumps(album_info["images"]),
-
-                'track_id': track_info['track_id'],
-                'track_name': track_info['track_name'],
-                'track_number': track_info['track_number'],
-                'key': track_info.get('key', None),
-                'duration_ms': track_info.get('duration_ms', None),
-                'instrumentalness': Decimal(str(track_info['instrumentalness'])) if track_info.get('instrumentalness') is not None else None,
-                'acousticness': Decimal(str(track_info['acousticness'])) if track_info.get('acousticness') is not None else None,
-                'danceability': Decimal(str(track_info['danceability'])) if track_info.get('danceability') is not None else None,
-                'energy': Decimal(str(track_info['energy'])) if track_info.get('energy') is not None else None,
-                'liveness': Decimal(str(track_info['liveness'])) if track_info.get('liveness') is not None else None,
-                'speechiness': Decimal(str(track_info['speechiness'])) if track_info.get('speechiness') is not None else None,
-                'valence': Decimal(str(track_info['valence'])) if track_info.get('valence') is not None else None,
-                'loudness': Decimal(str(track_info['loudness'])) if track_info.get('loudness') is not None else None,
-                'tempo': Decimal(str(track_info['tempo'])) if track_info.get('tempo') is not None else None,
-                'time_signature': track_info.get('time_signature', None)
-            }
-
-            batch_requests.append(entry)
-            # batch_requests.append({'PutRequest': {'Item': entry}})
-
-            # # Perform batch write if the number of batch requests reaches 25
-            # if len(batch_requests) == 25:
-            #     dynamodb.batch_write_item(RequestItems={table_name: batch_requests})
-            #     batch_requests = []
-
-    if batch_requests:
-        #dynamodb.batch_write_item(RequestItems={table_name: batch_requests})
-        batch_size = 25
-        num_batches = (len(batch_requests) + batch_size - 1) // batch_size  # Calculate total number of batches
-
-        for i in range(num_batches):
-            start_idx = i * batch_size
-            end_idx = min((i + 1) * batch_size, len(batch_requests))  # Calculate end index of the batch
-
-            batch = batch_requests[start_idx:end_idx]  # Get the current batch
-            if batch:
-                batch_df = pd.DataFrame(batch)
-                wr.dynamodb.put_df(df=batch_df, table_name=table_name)
-
-    # put_dynamodb_df(pd.DataFrame(lst),table_name)
-    insert_end = time.time() - insert_start
-    print(f"spotify_db: Time taken to insert to DB: {insert_end} seconds")
+    def album_items(album_info):
+        if compact:
+            return build_compact_album_items(artist_id, album_info)
+        return [build_entry(artist_data, artist_id, album_info, track_info) for track_info in album_info['tracks']]
+
+    async def produce():
+        batch = [build_compact_artist_item(artist_data, artist_id)] if compact else []
+        async for album_info in spotify_api.iter_discography_with_features(artist_id):
+            collector.add_album(album_info)
+            for item in album_items(album_info):
+                batch.append(item)
+                if len(batch) == batch_size:
+                    await queue.put(batch)
+                    batch = []
+        if batch:
+            await queue.put(batch)
+        # One sentinel per writer so they all stop
+        for _ in range(num_writers):
+            await queue.put(None)
+
+    async def write():
+        while True:
+            batch = await queue.get()
+            if batch is None:
+                return
+            await writer.write_batch_async(batch)
+            stats['items'] += len(batch)
+            stats['batches'] += 1
+            if stats['first_write'] is None:
+                stats['first_write'] = time.time() - start_time
+
+    pending = {asyncio.ensure_future(produce())} | {asyncio.ensure_future(write()) for _ in range(num_writers)}
+    try:
+        # Stop everything as soon as either side fails instead of leaving the other blocked on the queue
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_EXCEPTION)
+            for task in done:
+                if task.exception() is not None:
+                    raise task.exception()
+    finally:
+        for task in pending:
+            task.cancel()
+
+    insert_end = time.time() - start_time
+    print(f"spotify_db: Time to first DB write: {stats['first_write']} seconds")
+    print(f"spotify_db: Time taken to fetch and insert {stats['items']} items in {stats['batches']} batches: {insert_end} seconds")
+
+    # Aggregates go in once every track is written, so a stored summary always matches the stored rows
+    summary_start = time.time()
+    artist_summaries.put(collector.summarize(artist_id, artist_data))
+    print(f"spotify_db: Time taken to summarize and store the artist: {time.time() - summary_start} seconds")
 
     return
 
@@ -117,94 +235,822 @@ def put_dynamodb_df(df, table_name):
             batch.put_item(Item=item)
 
 
-def extract_relevant_info(artist_id):
-    dynamodb = boto3.client('dynamodb')
-    table_name = 'spotidy-1nf'
+# Columns the dashboard reads and their types: 'S' strings, 'int'/'float' numbers, and
+# 'image' for the JSON images blob, of which only the first URL is kept
+DASHBOARD_COLUMNS = {
+    'track_id': 'S',
+    'track_name': 'S',
+    'track_number': 'int',
+    'album_name': 'S',
+    'key': 'int',
+    'duration_ms': 'int',
+    'instrumentalness': 'float',
+    'acousticness': 'float',
+    'danceability': 'float',
+    'energy': 'float',
+    'liveness': 'float',
+    'speechiness': 'float',
+    'valence': 'float',
+    'loudness': 'float',
+    'tempo': 'float',
+    'time_signature': 'int',
+    'images': 'image'
+}
 
-    start_time = time.time()
 
-    response = dynamodb.query(
+@functools.lru_cache(maxsize=4096)
+def first_image_url(images_json):
+    # Every track of an album carries the same images blob, so each distinct one is parsed once
+    images = json.loads(images_json)
+    return images[0]["url"] if images else None
+
+
+def decode_items(pages, columns=DASHBOARD_COLUMNS):
+    # Gathers each column's raw attribute strings across all pages, then converts whole
+    # columns at once with NumPy. Missing numbers become NaN (int columns fall back to float).
+    raw = {column: [] for column in columns}
+    for items in pages:
+        for column, kind in columns.items():
+            attribute, missing = ('N', 'nan') if kind in ('int', 'float') else ('S', None)
+            try:
+                # Fast path: the attribute is present on every item of the page
+                raw[column] += [item[column][attribute] for item in items]
+            except KeyError:
+                # Absent attributes and ones stored as {'NULL': True} (None from the old put_df path) are missing
+                raw[column] += [item.get(column, {}).get(attribute, missing) for item in items]
+
+    decoded = {}
+    for column, kind in columns.items():
+        values = raw.pop(column)
+        if kind == 'float':
+            decoded[column] = np.array(values, dtype=np.float64)
+        elif kind == 'int':
+            array = np.array(values, dtype=np.float64)
+            decoded[column] = array if np.isnan(array).any() else array.astype(np.int64)
+        elif kind == 'image':
+            decoded[column] = np.array([first_image_url(value) if value else None for value in values], dtype=object)
+        else:
+            decoded[column] = np.array(values, dtype=object)
+    return pd.DataFrame(decoded, copy=False)
+
+
+def query_artist_pages(artist_id, columns, table_name=TABLE_NAME, client=None):
+    # Follows LastEvaluatedKey through every page, fetching only the requested columns.
+    # Every name goes through ExpressionAttributeNames since some (e.g. `key`) are reserved words.
+    client = client or get_dynamodb_client()
+    paginator = client.get_paginator('query')
+
+    attribute_names = {f'#{column}': column for column in columns}
+    attribute_names['#artist_id'] = 'artist_id'
+
+    consumed_capacity = 0
+    for page in paginator.paginate(
         TableName=table_name,
         KeyConditionExpression='#artist_id = :artist_id',
-        ExpressionAttributeNames={'#artist_id': 'artist_id'},
-        ExpressionAttributeValues={':artist_id': {'S': artist_id}}
-    )
-
-    print(response['Items'])
-
-    df = []
-
-    for item in response['Items']:
-        track_id = item['track_id']['S']
-        track_number = int(item['track_number']['N'])
-        energy = float(item['energy']['N'])
-        loudness = float(item['loudness']['N'])
-        key = int(item['key']['N'])
-        tempo = float(item['tempo']['N'])
-        speechiness = float(item['speechiness']['N'])
-        duration_ms = int(item['duration_ms']['N'])
-        valence = float(item['valence']['N'])
-        danceability = float(item['danceability']['N'])
-        instrumentalness = float(item['instrumentalness']['N'])
-        acousticness = float(item['acousticness']['N'])
-        time_signature = int(item['time_signature']['N'])
-        liveness = float(item['liveness']['N'])
-        images = json.loads(item['images']['S'])[0]["url"]
-
-        df.append({
-            'track_id': track_id,
-            'track_name': item['track_name']['S'],
-            'track_number': track_number,
-            'album_name': item['album_name']['S'],
-            'key': key,
-            'duration_ms': duration_ms,
-            'instrumentalness': instrumentalness,
-            'acousticness': acousticness,
-            'danceability': danceability,
-            'energy': energy,
-            'liveness': liveness,
-            'speechiness': speechiness,
-            'valence': valence,
-            'loudness': loudness,
-            'tempo': tempo,
-            'time_signature': time_signature,
-            'images': images
-        })
-    
-    df = pd.DataFrame(df)
+        ProjectionExpression=', '.join(f'#{column}' for column in columns),
+        ExpressionAttributeNames=attribute_names,
+        ExpressionAttributeValues={':artist_id': {'S': artist_id}},
+        ReturnConsumedCapacity='TOTAL'
+    ):
+        consumed_capacity += page.get('ConsumedCapacity', {}).get('CapacityUnits', 0)
+        yield page['Items']
+
+    print(f"spotify_db: Read capacity consumed for artist {artist_id}: {consumed_capacity} RCU")
+
+
+def extract_relevant_info(artist_id):
+    start_time = time.time()
+
+    df = decode_items(query_artist_pages(artist_id, list(DASHBOARD_COLUMNS)))
 
     extract_relevant_info_time = time.time() - start_time
     print(f"spotify_db: Time taken for extracting relevant information: {extract_relevant_info_time} seconds")
     
     return df
 
-async def search_view(artist_name):
+# Packed track-feature items store these columns as little-endian row-major matrices
+PACKED_FLOAT_COLUMNS = ['instrumentalness', 'acousticness', 'danceability', 'energy', 'liveness',
+                        'speechiness', 'valence', 'loudness', 'tempo']
+PACKED_INT_COLUMNS = ['track_number', 'key', 'duration_ms', 'time_signature']
+PACKED_INT_MISSING = np.iinfo(np.int64).min
+
+
+def build_compact_artist_item(artist_data, artist_id):
+    return {
+        'artist_id': artist_id,
+        'sk': 'ARTIST',
+        'name': artist_data['name'],
+        'followers': artist_data['followers']['total'],
+        'popularity': artist_data['popularity'],
+        'genres': json.dumps(artist_data['genres'])
+    }
+
+
+def pack_columns(tracks, columns, dtype, missing):
+    rows = [[float(track[column]) if track.get(column) is not None else missing for column in columns] for track in tracks]
+    return np.array(rows, dtype=dtype).reshape(len(tracks), len(columns)).astype(dtype.newbyteorder('<')).tobytes()
+
+
+def build_compact_album_items(artist_id, album_info, tracks_per_item=200):
+    # Album-level fields are stored once in the header instead of on every track
+    album_key = album_info.get('album_id') or album_info['album_name']
+    items = [{
+        'artist_id': artist_id,
+        'sk': f'ALBUM#{album_key}',
+        'album_name': album_info['album_name'],
+        'album_type': album_info['album_type'],
+        'total_tracks': album_info['total_tracks'],
+        'available_markets': json.dumps(album_info['available_markets']),
+        'images': json.dumps(album_info['images'])
+    }]
+
+    # Tracks are packed in chunks so even huge compilations stay well under the 400 KB item limit
+    tracks = album_info['tracks']
+    for chunk_number, start in enumerate(range(0, len(tracks), tracks_per_item)):
+        chunk = tracks[start:start + tracks_per_item]
+        items.append({
+            'artist_id': artist_id,
+            'sk': f'TRACKS#{album_key}#{chunk_number:04d}',
+            'track_ids': ','.join(track['track_id'] for track in chunk),
+            'track_names': json.dumps([track['track_name'] for track in chunk]),
+            'floats': pack_columns(chunk, PACKED_FLOAT_COLUMNS, np.dtype(np.float64), np.nan),
+            'ints': pack_columns(chunk, PACKED_INT_COLUMNS, np.dtype(np.int64), PACKED_INT_MISSING)
+        })
+    return items
+
+
+def read_compact_artist(artist_id, client=None):
+    # Returns the same frame as extract_relevant_info, read from the compact layout
+    client = client or get_dynamodb_client()
+    paginator = client.get_paginator('query')
 
     start_time = time.time()
-    
-    spotify_api = SpotifyAPI() 
-    artist_data = await spotify_api.search_for_artist(artist_name)
 
-    artist_time = time.time() - start_time
+    album_names, album_images, packs = {}, {}, []
+    for page in paginator.paginate(
+        TableName=COMPACT_TABLE_NAME,
+        KeyConditionExpression='#artist_id = :artist_id',
+        ProjectionExpression='#sk, #album_name, #images, #track_ids, #track_names, #floats, #ints',
+        ExpressionAttributeNames={'#artist_id': 'artist_id', '#sk': 'sk', '#album_name': 'album_name', '#images': 'images',
+                                  '#track_ids': 'track_ids', '#track_names': 'track_names', '#floats': 'floats', '#ints': 'ints'},
+        ExpressionAttributeValues={':artist_id': {'S': artist_id}}
+    ):
+        for item in page['Items']:
+            sort_key = item['sk']['S']
+            if sort_key.startswith('ALBUM#'):
+                album_key = sort_key[len('ALBUM#'):]
+                album_names[album_key] = item['album_name']['S']
+                album_images[album_key] = first_image_url(item['images']['S'])
+            elif sort_key.startswith('TRACKS#'):
+                packs.append(item)
 
-    print(f"spotify_db: Time taken to search Spotify API: {artist_time} seconds")
+    track_ids, track_names, album_column, image_column, floats, ints = [], [], [], [], [], []
+    for item in packs:
+        album_key = item['sk']['S'][len('TRACKS#'):].rsplit('#', 1)[0]
+        ids = item['track_ids']['S'].split(',')
+        track_ids += ids
+        track_names += json.loads(item['track_names']['S'])
+        album_column += [album_names.get(album_key)] * len(ids)
+        image_column += [album_images.get(album_key)] * len(ids)
+        floats.append(np.frombuffer(item['floats']['B'], dtype='<f8').reshape(len(ids), len(PACKED_FLOAT_COLUMNS)))
+        ints.append(np.frombuffer(item['ints']['B'], dtype='<i8').reshape(len(ids), len(PACKED_INT_COLUMNS)))
 
-    if artist_data:
-        artist_id = artist_data['id']
+    float_matrix = np.concatenate(floats) if floats else np.empty((0, len(PACKED_FLOAT_COLUMNS)))
+    int_matrix = np.concatenate(ints) if ints else np.empty((0, len(PACKED_INT_COLUMNS)), dtype=np.int64)
 
-        # Check if Artist in our DB
-        artist_present = check_artist_existence(artist_id)
+    columns = {'track_id': track_ids, 'track_name': track_names, 'album_name': album_column, 'images': image_column}
+    for index, column in enumerate(PACKED_FLOAT_COLUMNS):
+        columns[column] = float_matrix[:, index]
+    for index, column in enumerate(PACKED_INT_COLUMNS):
+        values = int_matrix[:, index]
+        missing = values == PACKED_INT_MISSING
+        columns[column] = np.where(missing, np.nan, values) if missing.any() else values
 
-        if not artist_present:
+    df = pd.DataFrame({column: columns[column] for column in DASHBOARD_COLUMNS})
 
-            # Artist not in DB, create df
-            print("spotify_db: Artist not in DB")
-            await create_entries(artist_data, artist_id)
-        
-        print("spotify_db: Extracting relevant information..")
-        return extract_relevant_info(artist_id)
-    
+    read_time = time.time() - start_time
+    print(f"spotify_db: Time taken for reading compact artist items: {read_time} seconds")
+
+    return df
+
+
+def load_artist_tracks(artist_id):
+    if STORAGE_LAYOUT == 'compact':
+        return read_compact_artist(artist_id)
+    return extract_relevant_info(artist_id)
+
+
+# Returned by lookup_artist_tracks when the artist has no stored tracks
+ARTIST_MISS = object()
+
+
+def lookup_artist_tracks(artist_id):
+    # One read serves both the existence check and the data on a hit
+    df = load_artist_tracks(artist_id)
+    return ARTIST_MISS if df.empty else df
+
+
+RADAR_CHART_COLUMNS = ['instrumentalness', 'acousticness', 'danceability',
+                       'energy', 'liveness', 'speechiness', 'valence']
+
+
+# Per-artist aggregates, computed once at ingest and stored next to the tracks (see ArtistSummaryStore)
+SUMMARY_FEATURES = PACKED_FLOAT_COLUMNS
+SUMMARY_PERCENTILES = (10, 25, 50, 75, 90)
+SUMMARY_TOP_K = 5
+# Albums get fewer top/bottom tracks so the item stays well under DynamoDB's 400 KB for big discographies
+SUMMARY_ALBUM_TOP_K = 3
+SUMMARY_SAMPLE_TRACKS = 12
+
+
+def feature_stats(values):
+    # Mean, min, max and percentiles of the values present, or None if there are none
+    values = values[~np.isnan(values)]
+    if not len(values):
+        return None
+    stats = {'mean': float(values.mean()), 'min': float(values.min()), 'max': float(values.max())}
+    for percentile, value in zip(SUMMARY_PERCENTILES, np.percentile(values, SUMMARY_PERCENTILES)):
+        stats[f'p{percentile}'] = float(value)
+    return stats
+
+
+def summarize_tracks(artist_id, track_ids, album_names, features, album_images=None, artist_data=None,
+                     top_k=SUMMARY_TOP_K, album_top_k=SUMMARY_ALBUM_TOP_K, sample_size=SUMMARY_SAMPLE_TRACKS):
+    # `features` maps each feature to a float64 array aligned with track_ids, NaN where Spotify had no value;
+    # `album_images` holds each track's album cover URL. Produces feature means/percentiles and top-k and
+    # bottom-k track ids, for the artist and for each album (plus its cover), and a spread of sample
+    # tracks, i.e. everything the dashboard draws before the per-track rows arrive.
+    track_ids = np.asarray(track_ids, dtype=object)
+    album_names = np.asarray(album_names, dtype=object)
+    album_images = np.asarray(album_images if album_images is not None else [None] * len(track_ids), dtype=object)
+    summary = {
+        'artist_id': artist_id,
+        'artist': {
+            'name': artist_data['name'],
+            'followers': artist_data['followers']['total'],
+            'popularity': artist_data['popularity'],
+            'genres': artist_data['genres']
+        } if artist_data else None,
+        'track_count': len(track_ids),
+        'sample_tracks': list(dict.fromkeys(
+            track_ids[np.linspace(0, len(track_ids) - 1, min(len(track_ids), sample_size)).astype(int)].tolist()))
+    }
+
+    matrix = np.vstack(list(features.values()))
+    summary['features'] = {feature: feature_stats(values) for feature, values in features.items()}
+    # One pass over every feature; ties keep album order
+    summary['top_tracks'], summary['bottom_tracks'] = top_bottom_tracks(track_ids, matrix, list(features), top_k)
+
+    summary['albums'] = []
+    for album_name in dict.fromkeys(album_names.tolist()):
+        in_album = album_names == album_name
+        images = [image for image in album_images[in_album] if image]
+        album_matrix = matrix[:, in_album]
+        top_tracks, bottom_tracks = top_bottom_tracks(track_ids[in_album], album_matrix, list(features), album_top_k)
+        summary['albums'].append({
+            'album_name': album_name,
+            'image': images[0] if images else None,
+            'track_count': int(in_album.sum()),
+            'features': {feature: feature_stats(values) for feature, values in zip(features, album_matrix)},
+            'top_tracks': top_tracks,
+            'bottom_tracks': bottom_tracks
+        })
+
+    # The {"feature": [...], "value": [...]} JSON the radar chart is drawn from
+    means = [summary['features'][feature]['mean'] if summary['features'][feature] else None
+             for feature in RADAR_CHART_COLUMNS]
+    summary['radar_chart'] = json.dumps({"feature": RADAR_CHART_COLUMNS, "value": means})
+    return summary
+
+
+def summarize_frame(artist_id, df, artist_data=None):
+    features = {feature: df[feature].to_numpy(dtype=np.float64, na_value=np.nan) for feature in SUMMARY_FEATURES}
+    return summarize_tracks(artist_id, df['track_id'].to_numpy(dtype=object), df['album_name'].to_numpy(dtype=object),
+                            features, df['images'].to_numpy(dtype=object), artist_data)
+
+
+class SummaryCollector:
+    def __init__(self):
+        # Gathers just the columns summarize_tracks needs while create_entries streams albums through
+        self.track_ids = []
+        self.album_names = []
+        self.album_images = []
+        self.features = {feature: [] for feature in SUMMARY_FEATURES}
+
+    def add_album(self, album_info):
+        image = album_info['images'][0]['url'] if album_info['images'] else None
+        for track_info in album_info['tracks']:
+            self.track_ids.append(track_info['track_id'])
+            self.album_names.append(album_info['album_name'])
+            self.album_images.append(image)
+            for feature, values in self.features.items():
+                value = track_info.get(feature)
+                values.append(np.nan if value is None else value)
+
+    def summarize(self, artist_id, artist_data=None):
+        features = {feature: np.array(values, dtype=np.float64) for feature, values in self.features.items()}
+        return summarize_tracks(artist_id, self.track_ids, self.album_names, features, self.album_images, artist_data)
+
+
+def normalize_artist_query(artist_name):
+    return ' '.join(artist_name.casefold().split())
+
+
+class ArtistCache:
+    def __init__(self, max_entries=64, max_bytes=256 * 1024 * 1024, ttl=3600):
+        # LRU of decoded artist entries keyed by artist id; normalized search strings are
+        # aliases pointing at an artist id. Lives at module level, so it survives warm invocations.
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.aliases = {}
+        self.bytes = 0
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0}
+
+    def entry_size(self, entry):
+        return int(entry['df'].memory_usage(index=True, deep=True).sum()) + len(entry['radar_chart'])
+
+    def resolve(self, key):
+        return self.aliases.get(key, key)
+
+    def get(self, key, record_miss=True):
+        artist_id = self.resolve(key)
+        cached = self.entries.get(artist_id)
+        if cached is None:
+            if record_miss:
+                self.stats['misses'] += 1
+            return None
+        if time.time() >= cached['expires_at']:
+            self.remove(artist_id)
+            self.stats['expirations'] += 1
+            self.stats['misses'] += 1
+            return None
+        self.entries.move_to_end(artist_id)
+        self.stats['hits'] += 1
+        return cached['entry']
+
+    def put(self, artist_id, entry, aliases=()):
+        self.remove(artist_id)
+        size = self.entry_size(entry)
+        if size > self.max_bytes:
+            return
+        self.entries[artist_id] = {'entry': entry, 'size': size, 'aliases': set(), 'expires_at': time.time() + self.ttl}
+        self.bytes += size
+        for alias in aliases:
+            self.alias(alias, artist_id)
+
+        while len(self.entries) > self.max_entries or self.bytes > self.max_bytes:
+            oldest = next(iter(self.entries))
+            self.remove(oldest)
+            self.stats['evictions'] += 1
+
+    def alias(self, key, artist_id):
+        if artist_id in self.entries and key != artist_id:
+            self.aliases[key] = artist_id
+            self.entries[artist_id]['aliases'].add(key)
+
+    def remove(self, artist_id):
+        cached = self.entries.pop(artist_id, None)
+        if cached is not None:
+            self.bytes -= cached['size']
+            for alias in cached['aliases']:
+                self.aliases.pop(alias, None)
+
+    def summary(self):
+        return {**self.stats, 'entries': len(self.entries), 'bytes': self.bytes}
+
+
+artist_cache = ArtistCache(
+    max_entries=int(os.environ.get('ARTIST_CACHE_MAX_ENTRIES', 64)),
+    max_bytes=int(os.environ.get('ARTIST_CACHE_MAX_BYTES', 256 * 1024 * 1024)),
+    ttl=int(os.environ.get('ARTIST_CACHE_TTL', 3600))
+)
+
+
+# The optional tables below only speed things up, so any error from them (a ClientError, or a
+# BotoCoreError such as a read timeout) degrades to memory.
+TABLE_ERRORS = (ClientError, BotoCoreError)
+# These two won't fix themselves, so the table is not tried again in this container; anything
+# else (e.g. throttling) is retried on the next call.
+TABLE_UNUSABLE_ERRORS = ('ResourceNotFoundException', 'AccessDeniedException')
+
+
+class OptionalTable:
+    # Shared by the optional tables: the client, error handling and an in-memory LRU in front
+    label = 'Optional'
+
+    def __init__(self, table_name, max_memory_entries=1024, client=None):
+        self.table_name = table_name
+        self.max_memory_entries = max_memory_entries
+        self.client = client
+        self.table_available = True
+        self.memory = OrderedDict()
+
+    def get_client(self):
+        return self.client or get_dynamodb_client()
+
+    def table_error(self, error, fallback):
+        code = error.response['Error']['Code'] if isinstance(error, ClientError) else type(error).__name__
+        print(f"spotify_db: {self.label} table {self.table_name} unavailable ({code}), {fallback}")
+        if code in TABLE_UNUSABLE_ERRORS:
+            self.table_available = False
+
+    def remember_in_memory(self, key, value):
+        self.memory[key] = value
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_memory_entries:
+            self.memory.popitem(last=False)
+
+
+SEARCH_TABLE_NAME = 'spotidy-artist-search'
+
+
+class ArtistResolver(OptionalTable):
+    label = 'Search'
+
+    def __init__(self, table_name=SEARCH_TABLE_NAME, ttl=7 * 24 * 3600, max_memory_entries=1024, client=None):
+        # Maps normalized search strings to the Spotify artist they resolved to, so repeat
+        # searches skip the Spotify search call. An in-memory LRU sits in front of a DynamoDB
+        # table (partition key `query`, TTL attribute `expires_at`) shared by all containers.
+        super().__init__(table_name, max_memory_entries, client)
+        self.ttl = ttl
+        self.stats = {'memory_hits': 0, 'table_hits': 0, 'misses': 0}
+
+    def resolve(self, query_key):
+        cached = self.memory.get(query_key)
+        if cached is not None and time.time() < cached[0]:
+            self.memory.move_to_end(query_key)
+            self.stats['memory_hits'] += 1
+            return cached[1]
+
+        if self.table_available:
+            try:
+                response = self.get_client().get_item(TableName=self.table_name, Key={'query': {'S': query_key}})
+            except TABLE_ERRORS as e:
+                self.table_error(e, "resolving through Spotify only")
+                response = {}
+
+            item = response.get('Item')
+            # DynamoDB deletes expired items lazily, so the expiry is checked here as well
+            if item is not None and time.time() < int(item['expires_at']['N']):
+                artist_data = json.loads(item['artist']['S'])
+                self.remember_in_memory(query_key, (int(item['expires_at']['N']), artist_data))
+                self.stats['table_hits'] += 1
+                return artist_data
+
+        self.stats['misses'] += 1
+        return None
+
+    def remember(self, query_key, artist_data):
+        # Only the fields create_entries needs are kept
+        artist_data = {
+            'id': artist_data['id'],
+            'name': artist_data['name'],
+            'followers': {'total': artist_data['followers']['total']},
+            'popularity': artist_data['popularity'],
+            'genres': artist_data['genres']
+        }
+        expires_at = int(time.time() + self.ttl)
+        self.remember_in_memory(query_key, (expires_at, artist_data))
+
+        if self.table_available:
+            try:
+                self.get_client().put_item(TableName=self.table_name, Item={
+                    'query': {'S': query_key},
+                    'artist_id': {'S': artist_data['id']},
+                    'artist': {'S': json.dumps(artist_data)},
+                    'expires_at': {'N': str(expires_at)}
+                })
+            except TABLE_ERRORS as e:
+                self.table_error(e, "keeping resolutions in memory only")
+
+
+artist_resolver = ArtistResolver(
+    ttl=int(os.environ.get('ARTIST_SEARCH_TTL', 7 * 24 * 3600)),
+    max_memory_entries=int(os.environ.get('ARTIST_SEARCH_MAX_ENTRIES', 1024))
+)
+
+
+LEASE_TABLE_NAME = 'spotidy-ingest-leases'
+
+
+class IngestLease(OptionalTable):
+    label = 'Lease'
+
+    def __init__(self, table_name=LEASE_TABLE_NAME, lease_seconds=300, poll_interval=0.5, client=None):
+        # Cross-container ingest lock: a conditional put on an item keyed by artist_id
+        # (partition key `artist_id`, TTL attribute `expires_at`). The holder renews it every
+        # third of lease_seconds while it ingests; a crashed holder's lease simply expires and
+        # can then be taken over. Leases are never kept in memory.
+        super().__init__(table_name, max_memory_entries=0, client=client)
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.owner = str(uuid.uuid4())
+
+    def acquire(self, artist_id):
+        if not self.table_available:
+            return True
+        now = int(time.time())
+        try:
+            self.get_client().put_item(
+                TableName=self.table_name,
+                Item={'artist_id': {'S': artist_id}, 'owner': {'S': self.owner},
+                      'expires_at': {'N': str(now + self.lease_seconds)}},
+                ConditionExpression='attribute_not_exists(artist_id) OR expires_at < :now',
+                ExpressionAttributeValues={':now': {'N': str(now)}}
+            )
+            return True
+        except self.get_client().exceptions.ConditionalCheckFailedException:
+            return False
+        except TABLE_ERRORS as e:
+            self.table_error(e, "deduplicating ingests in-process only")
+            return True
+
+    def renew(self, artist_id):
+        if not self.table_available:
+            return
+        try:
+            self.get_client().update_item(
+                TableName=self.table_name,
+                Key={'artist_id': {'S': artist_id}},
+                UpdateExpression='SET expires_at = :expires_at',
+                ConditionExpression='#owner = :owner',
+                ExpressionAttributeNames={'#owner': 'owner'},
+                ExpressionAttributeValues={':owner': {'S': self.owner},
+                                           ':expires_at': {'N': str(int(time.time()) + self.lease_seconds)}}
+            )
+        except self.get_client().exceptions.ConditionalCheckFailedException:
+            print(f"spotify_db: Lost the ingest lease on artist {artist_id}")
+        except TABLE_ERRORS as e:
+            self.table_error(e, "deduplicating ingests in-process only")
+
+    async def keep_alive(self, artist_id):
+        # Runs alongside the ingest until cancelled, so ingests longer than lease_seconds keep the lease
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            self.renew(artist_id)
+
+    def release(self, artist_id):
+        if not self.table_available:
+            return
+        try:
+            self.get_client().delete_item(
+                TableName=self.table_name,
+                Key={'artist_id': {'S': artist_id}},
+                ConditionExpression='#owner = :owner',
+                ExpressionAttributeNames={'#owner': 'owner'},
+                ExpressionAttributeValues={':owner': {'S': self.owner}}
+            )
+        except self.get_client().exceptions.ConditionalCheckFailedException:
+            # The lease expired and someone else took it over
+            pass
+        except TABLE_ERRORS as e:
+            self.table_error(e, "deduplicating ingests in-process only")
+
+    def is_held(self, artist_id):
+        if not self.table_available:
+            return False
+        try:
+            item = self.get_client().get_item(TableName=self.table_name, Key={'artist_id': {'S': artist_id}}).get('Item')
+        except TABLE_ERRORS as e:
+            self.table_error(e, "deduplicating ingests in-process only")
+            return False
+        return item is not None and int(item['expires_at']['N']) >= time.time()
+
+    async def wait_released(self, artist_id):
+        while self.is_held(artist_id):
+            await asyncio.sleep(self.poll_interval)
+
+
+ingest_lease = IngestLease(lease_seconds=int(os.environ.get('INGEST_LEASE_SECONDS', 300)))
+
+SUMMARY_TABLE_NAME = 'spotidy-artist-summary'
+
+
+class ArtistSummaryStore(OptionalTable):
+    label = 'Summary'
+
+    def __init__(self, table_name=SUMMARY_TABLE_NAME, max_memory_entries=1024, client=None):
+        # One item per artist (partition key `artist_id`) holding the summarize_tracks output as
+        # zlib-compressed JSON (about 6x smaller, which keeps big discographies under the 400 KB item
+        # limit), with an in-memory LRU in front. Artists ingested before summaries existed have no
+        # item; ones summarized before compression have the JSON as a string.
+        super().__init__(table_name, max_memory_entries, client)
+
+    def read(self, artist_id):
+        # Like get, but table errors are raised
+        summary = self.memory.get(artist_id)
+        if summary is not None:
+            self.memory.move_to_end(artist_id)
+            return summary
+
+        if not self.table_available:
+            return None
+        item = self.get_client().get_item(TableName=self.table_name, Key={'artist_id': {'S': artist_id}}).get('Item')
+        if item is None:
+            return None
+        stored = item['summary']
+        summary = json.loads(zlib.decompress(stored['B']) if 'B' in stored else stored['S'])
+        self.remember_in_memory(summary['artist_id'], summary)
+        return summary
+
+    def get(self, artist_id):
+        try:
+            return self.read(artist_id)
+        except TABLE_ERRORS as e:
+            self.table_error(e, "summarizing from track rows only")
+            return None
+
+    def is_complete(self, artist_id):
+        # create_entries stores the summary after the artist's last track row, so a stored summary
+        # marks a complete ingest. None if that can't be told (no usable table, or an error).
+        try:
+            if self.read(artist_id) is not None:
+                return True
+        except TABLE_ERRORS as e:
+            self.table_error(e, "can't tell whether the artist's rows are complete")
+            return None
+        return False if self.table_available else None
+
+    def put(self, summary):
+        self.remember_in_memory(summary['artist_id'], summary)
+        if not self.table_available:
+            return
+        try:
+            self.get_client().put_item(TableName=self.table_name, Item={
+                'artist_id': {'S': summary['artist_id']},
+                'summary': {'B': zlib.compress(json.dumps(summary, separators=(',', ':')).encode('utf-8'))},
+                'updated_at': {'N': str(int(time.time()))}
+            })
+        except TABLE_ERRORS as e:
+            # The track rows are already written, so a failed put must not fail the ingest
+            self.table_error(e, "keeping summaries in memory only")
+
+
+artist_summaries = ArtistSummaryStore(max_memory_entries=int(os.environ.get('ARTIST_SUMMARY_MAX_ENTRIES', 1024)))
+
+
+# In-flight ingests in this process, so concurrent searches for one artist share a single ingest
+ingest_tasks = {}
+
+
+def is_ingested(artist_id):
+    # Rows without a summary come from an ingest that died part way (or from before summaries);
+    # they are ingested again, which is safe since every put is keyed. Without a usable summary
+    # table there is no marker, so any stored rows have to count.
+    complete = artist_summaries.is_complete(artist_id)
+    return check_artist_existence(artist_id) if complete is None else complete
+
+
+async def run_ingest(artist_data, artist_id, spotify_api):
+    while True:
+        if ingest_lease.acquire(artist_id):
+            renewal = asyncio.ensure_future(ingest_lease.keep_alive(artist_id))
+            try:
+                # Another container may have finished the ingest between our miss and the lease
+                if not is_ingested(artist_id):
+                    await create_entries(artist_data, artist_id, spotify_api)
+            finally:
+                renewal.cancel()
+                ingest_lease.release(artist_id)
+            break
+
+        print(f"spotify_db: Artist {artist_id} is being ingested elsewhere, waiting for it")
+        await ingest_lease.wait_released(artist_id)
+        if is_ingested(artist_id):
+            break
+        # The other ingest died before finishing; try to take the lease ourselves
+
+    return load_artist_tracks(artist_id)
+
+
+async def ingest_artist(artist_data, artist_id, spotify_api):
+    task = ingest_tasks.get(artist_id)
+    if task is None or task.get_loop() is not asyncio.get_running_loop():
+        task = asyncio.ensure_future(run_ingest(artist_data, artist_id, spotify_api))
+        ingest_tasks[artist_id] = task
+        task.add_done_callback(lambda done: ingest_tasks.pop(artist_id) if ingest_tasks.get(artist_id) is done else None)
+    else:
+        print(f"spotify_db: Joining in-flight ingest of artist {artist_id}")
+
+    # Shielded so one caller giving up doesn't cancel the ingest the others are waiting on
+    return await asyncio.shield(task)
+
+
+async def resolve_artist(artist_name, query_key, spotify_api):
+    artist_data = artist_resolver.resolve(query_key)
+
+    if artist_data is None:
+        start_time = time.time()
+
+        artist_data = await spotify_api.search_for_artist(artist_name)
+
+        artist_time = time.time() - start_time
+
+        print(f"spotify_db: Time taken to search Spotify API: {artist_time} seconds")
+
+        if not artist_data:
+            return None
+
+        artist_resolver.remember(query_key, artist_data)
+
+    return artist_data
+
+
+async def search_artist(artist_name, spotify_api=None):
+    # Returns {'artist_id', 'df', 'radar_chart', 'summary'} for the artist, or None if Spotify has no match.
+    # Repeat searches are answered from artist_cache without touching Spotify or DynamoDB.
+    if spotify_api is None:
+        async with SpotifyAPI() as spotify_api:
+            return await search_artist(artist_name, spotify_api)
+
+    query_key = normalize_artist_query(artist_name)
+    entry = artist_cache.get(query_key, record_miss=False)
+    if entry is not None:
+        print(f"spotify_db: Artist cache hit for '{query_key}': {artist_cache.summary()}")
+        return entry
+
+    artist_data = await resolve_artist(artist_name, query_key, spotify_api)
+    if artist_data is None:
+        return None
+
+    artist_id = artist_data['id']
+
+    entry = artist_cache.get(artist_id)
+    if entry is not None:
+        # A different spelling of an artist that is already cached
+        artist_cache.alias(query_key, artist_id)
+        return entry
+
+    if artist_id in ingest_tasks:
+        df = await ingest_artist(artist_data, artist_id, spotify_api)
     else:
+        # Check if Artist in our DB, reading its tracks in the same query
+        print("spotify_db: Extracting relevant information..")
+        df = lookup_artist_tracks(artist_id)
+
+        # Rows without a stored summary are from an ingest that died, is still running elsewhere or
+        # predates summaries; ingest_artist waits for a running one and redoes the others. With no
+        # usable summary table only a held lease tells an unfinished ingest apart.
+        complete = None if df is ARTIST_MISS else artist_summaries.is_complete(artist_id)
+        if df is ARTIST_MISS or complete is False or (complete is None and ingest_lease.is_held(artist_id)):
+
+            # Artist not (completely) in DB, create df
+            print("spotify_db: Artist not in DB" if df is ARTIST_MISS else "spotify_db: Artist's rows are incomplete")
+            df = await ingest_artist(artist_data, artist_id, spotify_api)
+
+    # The stored summary vouches for the rows; frames it can't vouch for are served but not cached,
+    # since they may be partial, and their summary is derived from the rows without being stored
+    stored_summary = artist_summaries.get(artist_id)
+    summary = stored_summary or summarize_frame(artist_id, df, artist_data)
+    entry = {'artist_id': artist_id, 'df': df, 'radar_chart': summary['radar_chart'], 'summary': summary}
+    if stored_summary is not None:
+        artist_cache.put(artist_id, entry, aliases=[query_key])
+        print(f"spotify_db: Artist cache: {artist_cache.summary()}")
+
+    return entry
+
+
+async def search_artist_summary(artist_name, spotify_api=None):
+    # Just the aggregates (see summarize_tracks): one small item instead of every track row. Falls
+    # back to a full search, which reads or ingests the tracks, when no summary is stored yet.
+    if spotify_api is None:
+        async with SpotifyAPI() as spotify_api:
+            return await search_artist_summary(artist_name, spotify_api)
+
+    query_key = normalize_artist_query(artist_name)
+    entry = artist_cache.get(query_key, record_miss=False)
+    if entry is not None:
+        return entry['summary']
+
+    artist_data = await resolve_artist(artist_name, query_key, spotify_api)
+    if artist_data is None:
+        return None
+
+    artist_id = artist_data['id']
+    entry = artist_cache.get(artist_id, record_miss=False)
+    if entry is not None:
+        return entry['summary']
+
+    # The summary is written after the last track, so a stored one never describes a partial ingest
+    summary = artist_summaries.get(artist_id)
+    if summary is not None:
+        return summary
+
+    # search_artist re-ingests rows that have no summary (partial, or from before summaries), and
+    # that ingest stores one. A summary it derives from rows it couldn't verify is returned but never
+    # stored, since a stored summary marks the rows as complete.
+    entry = await search_artist(artist_name, spotify_api)
+    if entry is None:
+        return None
+    return entry['summary']
+
+
+async def search_view(artist_name, spotify_api=None):
+    entry = await search_artist(artist_name, spotify_api)
+    if entry is None:
         return "No such artist exists!"
+    return entry['df']
 
-         
\ No newline at end of file
+         
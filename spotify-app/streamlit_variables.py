@@ -2,12 +2,13 @@ import streamlit as st
 import plotly.express as px
 import pandas as pd
 import json
-import requests
-import asyncio
+import concurrent.futures
 import time
 import random
-import urllib.parse
 from spotify_api import SpotifyAPI
+from search_client import SearchClient, SearchError, SearchResultCache
+from session_store import session_store
+from track_analytics import sort_tracklist
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -117,22 +118,17 @@ def query_artist():
 
 def render_page_1():
     
-    if 'user' in query_params:
+    if 'session' in query_params:
         start_time = time.time()
-    # Extract user-related data from query parameters
-        user_data_decoded = urllib.parse.unquote(query_params['user'])
+        # Flask left the /user_data payload in the session store; it is read once per Streamlit session
+        if 'user_data' not in st.session_state:
+            st.session_state.user_data = session_store.get(query_params['session'])
 
-        print(type(query_params['user']))
+        user_data = st.session_state.user_data
 
-        print(query_params['user'])
-
-        user_data = json.loads(user_data_decoded)
-
-        print(user_data)
-
-        #user_data = json.loads(user_data)
-
-        print(type(user_data))
+        if user_data is None:
+            st.warning("Your session has expired. Please log in again.")
+            return
 
         display_name = user_data['username']
 
@@ -316,6 +312,84 @@ def render_page_1():
 
 base_url = 'https://9e49g24h2h.execute-api.us-east-1.amazonaws.com/'
 
+# Streamlit already depends on pyarrow, so ask /search for the binary Arrow body (see search_encoding)
+search_format = 'arrow'
+
+# The artist page is drawn in two phases: /summary (aggregates, covers, sample tracks) first, then
+# /search (every track) for the Tracklist Trend. Both are memoized twice: a process-wide cache shares
+# decoded results across sessions for an hour, and each session keeps its last few artists so reruns
+# (checkbox, multiselect) reuse the same objects. Misses go through the session's SearchClient.
+search_cache_ttl = 3600
+search_cache_max_entries = 32
+session_search_max_entries = 8
+
+def artist_search_key(artist_name):
+    # Same normalization as spotify_db.normalize_artist_query, so "Adele " and "adele" share an entry
+    return ' '.join(artist_name.casefold().split())
+
+@st.cache_resource
+def get_search_cache():
+    # Results are shared, not copied, between sessions; the pages only read them
+    return SearchResultCache(ttl=search_cache_ttl, max_entries=search_cache_max_entries)
+
+def get_search_client():
+    if 'search_client' not in st.session_state:
+        st.session_state.search_client = SearchClient(base_url, search_format)
+    return st.session_state.search_client
+
+def load_from_backend(route, artist_name, status_label):
+    # Returns (status_code, result) for the 'summary' or 'search' route; status_code is None if a
+    # newer search replaced this one. Results are kept per session, so reruns don't hit the API.
+    artist_key = artist_search_key(artist_name)
+    key = (route, artist_key)
+    results = st.session_state.setdefault('artist_results', {})
+
+    if key in results:
+        # Move to the end so the least recently viewed artist is dropped first
+        results[key] = results.pop(key)
+        return 200, results[key]
+
+    result = get_search_cache().get(key)
+    if result is None:
+        client = get_search_client()
+        future = client.submit(artist_key, route)
+
+        # Poll rather than block, so the page shows retry progress. Streamlit only stops a run for a
+        # new search when the run sends something, so the label is re-sent on every poll
+        with st.status(status_label) as status:
+            label = status_label
+            while not future.done():
+                label = client.progress.get(key, label)
+                status.update(label=label)
+                concurrent.futures.wait([future], timeout=0.5)
+
+            try:
+                result = future.result()
+            except concurrent.futures.CancelledError:
+                return None, None
+            except SearchError as e:
+                status.update(label=f"Search failed ({e})", state="error")
+                return e.status_code, None
+            status.update(label=f"Loaded {artist_name}", state="complete")
+
+        get_search_cache().put(key, result)
+
+    results[key] = result
+    # Each artist has a summary and a per-track entry
+    while len(results) > 2 * session_search_max_entries:
+        results.pop(next(iter(results)))
+    return 200, result
+
+def prefetch_artist_search(artist_name):
+    # Starts the per-track download in the background unless it is already cached
+    artist_key = artist_search_key(artist_name)
+    key = ('search', artist_key)
+    if key not in st.session_state.get('artist_results', {}) and get_search_cache().get(key) is None:
+        get_search_client().submit(artist_key, 'search')
+
+def track_embed(track_id, height):
+    return f'<iframe src="https://open.spotify.com/embed/track/{track_id}" width="100%" height="{height}" frameborder="0" allowtransparency="true" allow="encrypted-media"></iframe>'
+
 def radar_chart(avg_df):
 
     # Create a radar chart using Plotly Express
@@ -347,8 +421,7 @@ def tracklist_trend(df):
         selected_albums = selected_albums[:5]
 
     # Filter data based on user selections
-    filtered_df = df[df['album_name'].isin(selected_albums)]
-    filtered_df = filtered_df.groupby('album_name').apply(lambda x: x.sort_values('track_number')).reset_index(drop=True)
+    filtered_df = sort_tracklist(df[df['album_name'].isin(selected_albums)])
     filtered_df = filtered_df.rename(columns={'album_name': 'Album', 'track_number': 'Track Number', selected_feature:selected_feature.capitalize()})
 
     # Plot default line chart
@@ -369,7 +442,7 @@ def go_back_to_dashboard():
     st.experimental_rerun()  # Use `st.experimental_rerun()` instead of `st.rerun()`
 
 # Function to render page 2 content
-async def render_page_2():
+def render_page_2():
 
     # Place the button at the top of the page
     if st.button("Go back to User Dashboard"):
@@ -391,203 +464,154 @@ async def render_page_2():
 
     if 'name_artist' in st.session_state and st.session_state.name_artist is not None:
         Name_of_Artist = st.session_state.name_artist
-        params = {'artist': Name_of_Artist}
         artist_time = time.time()
 
-        # Retry mechanism
-        max_retries = 2
-        retry_count = 0
-        while retry_count < max_retries:
+        # Start fetching the per-track data right away; only the Tracklist Trend needs it, so
+        # everything else is drawn from the much smaller summary while it downloads
+        prefetch_artist_search(Name_of_Artist)
+        status_code, summary = load_from_backend('summary', Name_of_Artist, f"Searching for {Name_of_Artist}...")
 
-            response = requests.get(base_url + "search", params=params)
+        artist_end_time = time.time() - artist_time
+        print(f"Time taken for summary_view function: {artist_end_time} seconds")
 
-            artist_end_time = time.time() - artist_time
-            print(f"Time taken for search_view function: {artist_end_time} seconds")
+        if status_code == 200:
 
-            if response.status_code == 200:
-                
-                data = response.json()
+            # Display Artist name
+            st.markdown(f"<h1 class='custom-heading-artist'>{st.session_state.name_artist}'s Discography</h1>", unsafe_allow_html=True)
 
-                df = pd.read_json(data["df"])
+            # Display Artist Dashboard
 
-                radar_chart_df = pd.read_json(data["radar_chart"])
+            # Random album covers and tracks from the summary's spread of sample tracks
+            album_images = [album['image'] for album in summary['albums'] if album.get('image')]
+            sample_tracks = summary['sample_tracks']
+            random_images = [random.choice(album_images) for _ in range(3)] if album_images else [None] * 3
+            random_songs = [random.choice(sample_tracks) for _ in range(6)]
 
-                # Display Artist name
-                st.markdown(f"<h1 class='custom-heading-artist'>{st.session_state.name_artist}'s Discography</h1>", unsafe_allow_html=True)
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                if random_images[0]:
+                    st.image(random_images[0])
+            with col2:
+                if random_images[1]:
+                    st.image(random_images[1])
+            with col3:
+                for track_id in random_songs[:4]:
+                    st.markdown(track_embed(track_id, 80), unsafe_allow_html=True)
 
-                # Display Artist Dashboard
+            col1, col2 = st.columns(2)
+            with col1:
+                st.markdown(track_embed(random_songs[4], 500), unsafe_allow_html=True)
+            with col2:
+                if random_images[2]:
+                    st.image(random_images[2])
 
-                # Initialize random index
-                discography_length = len(df)
-                random_image_1 = random.randint(0, discography_length - 1)
-                random_image_2 = random.randint(0, discography_length - 1)
-                random_image_3 = random.randint(0, discography_length - 1)
+            st.markdown(track_embed(random_songs[5], 500), unsafe_allow_html=True)
 
-                random_song_1 = random.randint(0, discography_length - 1)
-                random_song_2 = random.randint(0, discography_length - 1)
-                random_song_3 = random.randint(0, discography_length - 1)
-                random_song_4 = random.randint(0, discography_length - 1)
-                random_song_5 = random.randint(0, discography_length - 1)
-                random_song_6 = random.randint(0, discography_length - 1)
 
-                col1, col2, col3 = st.columns(3)
-                with col1:
-                    st.image(df['images'][random_image_1])
-                with col2:
-                    st.image(df['images'][random_image_2])
-                with col3:
-                    track_id = df['track_id'][random_song_1]
-                    embed_code = f'<iframe src="https://open.spotify.com/embed/track/{track_id}" width="100%" height="80" frameborder="0" allowtransparency="true" allow="encrypted-media"></iframe>'
-                    st.markdown(embed_code, unsafe_allow_html=True)
-                    track_id = df['track_id'][random_song_2]
-                    embed_code = f'<iframe src="https://open.spotify.com/embed/track/{track_id}" width="100%" height="80" frameborder="0" allowtransparency="true" allow="encrypted-media"></iframe>'
-                    st.markdown(embed_code, unsafe_allow_html=True)
-                    track_id = df['track_id'][random_song_3]
-                    embed_code = f'<iframe src="https://open.spotify.com/embed/track/{track_id}" width="100%" height="80" frameborder="0" allowtransparency="true" allow="encrypted-media"></iframe>'
-                    st.markdown(embed_code, unsafe_allow_html=True)
-                    track_id = df['track_id'][random_song_4]
-                    embed_code = f'<iframe src="https://open.spotify.com/embed/track/{track_id}" width="100%" height="80" frameborder="0" allowtransparency="true" allow="encrypted-media"></iframe>'
-                    st.markdown(embed_code, unsafe_allow_html=True)
+            ## Streamlit Charts
 
+            st.markdown("<h1 class='custom-heading-track-features'>Track Features Analysis</h1>", unsafe_allow_html=True)
+
+            with st.container(border=True):
                 col1, col2 = st.columns(2)
+
+                # Display the radar chart
                 with col1:
-                    track_id = df['track_id'][random_song_5]
-                    embed_code = f'<iframe src="https://open.spotify.com/embed/track/{track_id}" width="100%" height="500" frameborder="0" allowtransparency="true" allow="encrypted-media"></iframe>'
-                    st.markdown(embed_code, unsafe_allow_html=True)
+                    st.title("Radar Chart")
+                    radar_start = time.time()
+                    radar_chart(pd.DataFrame(json.loads(summary['radar_chart'])))
+                    radar_end_time = time.time() - radar_start
+                    print(f"Time taken for radar chart: {radar_end_time} seconds")
+
+                ## Tracklist Trend: filled in at the end of the run, once the per-track data is here
                 with col2:
-                    st.image(df['images'][random_image_3])
+                    st.title("Tracklist Trend")
+                    st.subheader("Shows the trend of tracks by track features:")
+                    tracklist_container = st.container()
 
-                track_id = df['track_id'][random_song_6]
-                embed_code = f'<iframe src="https://open.spotify.com/embed/track/{track_id}" width="100%" height="500" frameborder="0" allowtransparency="true" allow="encrypted-media"></iframe>'
-                st.markdown(embed_code, unsafe_allow_html=True)
+            ## Top Tracks by track_features
 
+            st.markdown("<h1 class='custom-heading-top-moods'>Top Moods</h1>", unsafe_allow_html=True)
 
-                ## Streamlit Charts
+            show_most = st.checkbox("Show Most", value=True)
 
-                st.markdown("<h1 class='custom-heading-track-features'>Track Features Analysis</h1>", unsafe_allow_html=True)
+            # The summary already holds each feature's top and bottom tracks
+            mood_tracks = summary['top_tracks'] if show_most else summary['bottom_tracks']
 
-                with st.container(border=True):
-                    col1, col2 = st.columns(2)
+            with st.container(border=True):
+                col1, col2 = st.columns(2)
 
-                    # Display the radar chart
-                    with col1:
-                        st.title("Radar Chart")
-                        radar_start = time.time()
-                        radar_chart(radar_chart_df)
-                        radar_end_time = time.time() - radar_start
-                        print(f"Time taken for radar chart: {radar_end_time} seconds")
+                with col1:
+                    # Display top energetic tracks
+                    if show_most:
+                        st.title(":zap: Most Energetic Tracks")
+                        st.subheader("Energetic tracks feel upbeat, fast, and loud.")
+                    else:
+                        st.title(":rain_cloud: Least Energetic Tracks")
+                        st.subheader("Unenergetic tracks feel downbeat, slow, and quiet.")
 
-                    ## Tracklist Trend
-                    with col2:
-                        st.title("Tracklist Trend")
-                        st.subheader("Shows the trend of tracks by track features:")
-                        tracklist_start = time.time()
-                        tracklist_trend(df)
-                        tracklist_end_time = time.time() - tracklist_start
-                        print(f"Time taken for tracklist trend chart: {tracklist_end_time} seconds")
+                    for track_id in mood_tracks['energy'][:3]:
+                        st.markdown(track_embed(track_id, 80), unsafe_allow_html=True)
 
-                ## Top Tracks by track_features
-                
-                # Initialize the toggle button state
-                show_most = True
-                
-                st.markdown("<h1 class='custom-heading-top-moods'>Top Moods</h1>", unsafe_allow_html=True)
-
-                show_most = st.checkbox("Show Most", value=True)
-
-                with st.container(border=True):
-                    col1, col2 = st.columns(2)
-
-                    with col1:
-                        
-                        # Display top energetic tracks
-                        if show_most:
-                            st.title(":zap: Most Energetic Tracks")
-                            st.subheader("Energetic tracks feel upbeat, fast, and loud.")
-                            top_energy_tracks_df = df.sort_values('energy', ascending=False).head(3)
-                        else:
-                            st.title(":rain_cloud: Least Energetic Tracks")
-                            st.subheader("Unenergetic tracks feel downbeat, slow, and quiet.")
-                            top_energy_tracks_df = df.sort_values('energy', ascending=True).head(3)
-                        
-                        top_energy_track_names = top_energy_tracks_df['track_name'].tolist()
-                        
-                        for index, row in top_energy_tracks_df.iterrows():
-                            track_id = row['track_id']
-                            embed_code = f'<iframe src="https://open.spotify.com/embed/track/{track_id}" width="100%" height="80" frameborder="0" allowtransparency="true" allow="encrypted-media"></iframe>'
-                            st.markdown(embed_code, unsafe_allow_html=True)
-
-                    with col2:
-                        # Display top acoustic tracks
-                        if show_most:
-                            st.title(":guitar: Most Acoustic Tracks")
-                            st.subheader("Acoustic tracks feel more instrumental, vocal, and raw.")
-                            top_acoustic_tracks_df = df.sort_values('acousticness', ascending=False).head(3)
-                        else:
-                            st.title(":radio: Least Acoustic Tracks")
-                            st.subheader("Unacoustic tracks feel less instrumental, vocal, and raw.")
-                            top_acoustic_tracks_df = df.sort_values('acousticness', ascending=True).head(3)
-
-                        top_acoustic_track_names = top_acoustic_tracks_df['track_name'].tolist()
-                        
-                        for index, row in top_acoustic_tracks_df.iterrows():
-                            track_id = row['track_id']
-                            embed_code = f'<iframe src="https://open.spotify.com/embed/track/{track_id}" width="100%" height="80" frameborder="0" allowtransparency="true" allow="encrypted-media"></iframe>'
-                            st.markdown(embed_code, unsafe_allow_html=True)
-                
-                with st.container(border=True):
-                    col1, col2 = st.columns(2)
-
-                    with col1:
-                        # Display top danceable songs
-                        if show_most:
-                            st.title(":dancer: Most Danceable Tracks:")
-                            st.subheader("Danceable songs have strong beats, stable rhythms, and regular tempos!")
-                            top_danceability_tracks_df = df.sort_values('danceability', ascending=False).head(3)
-                        else:
-                            st.title(":sleeping: Least Danceable Tracks:")
-                            st.subheader("Undanceable songs have weak beats, unstable rhythms, and irregular tempos")
-                            top_danceability_tracks_df = df.sort_values('danceability', ascending=True).head(3)
-
-                        top_danceability_track_names = top_danceability_tracks_df['track_name'].tolist()
-                        
-                        for index, row in top_danceability_tracks_df.iterrows():
-                            track_id = row['track_id']
-                            embed_code = f'<iframe src="https://open.spotify.com/embed/track/{track_id}" width="100%" height="80" frameborder="0" allowtransparency="true" allow="encrypted-media"></iframe>'
-                            st.markdown(embed_code, unsafe_allow_html=True)
-
-                    with col2:
-                        # Display top happy songs
-                        if show_most:
-                            st.title(":smile_cat: Most Happy Tracks:")
-                            st.subheader("Happy songs are measured by musical positivety that likely make you feel cheerful or euphoric.")
-                            top_valence_tracks_df = df.sort_values('valence', ascending=False).head(3)
-                        else:
-                            st.title(":crying_cat_face: Least Happy Tracks:")
-                            st.subheader("Unhappy songs are measured by musical positivety that likely make you feel upset or emotional.")
-                            top_valence_tracks_df = df.sort_values('valence', ascending=True).head(3)
-
-                        top_valence_track_names = top_valence_tracks_df['track_name'].tolist()
-
-                        for index, row in top_valence_tracks_df.iterrows():
-                            track_id = row['track_id']
-                            embed_code = f'<iframe src="https://open.spotify.com/embed/track/{track_id}" width="100%" height="80" frameborder="0" allowtransparency="true" allow="encrypted-media"></iframe>'
-                            st.markdown(embed_code, unsafe_allow_html=True)
-
-                break
-
-            elif response.status_code == 500:
-                # Retry after waiting for 3 seconds
-                time.sleep(3)
-                retry_count += 1
-                continue
-            else:
-                # Handle other status codes
-                st.warning("Failed to retrieve data. Please try again later.")
-                return
-            
-        if retry_count == max_retries:
-            st.warning("Failed to retrieve data after multiple attempts. Please try again later.")
+                with col2:
+                    # Display top acoustic tracks
+                    if show_most:
+                        st.title(":guitar: Most Acoustic Tracks")
+                        st.subheader("Acoustic tracks feel more instrumental, vocal, and raw.")
+                    else:
+                        st.title(":radio: Least Acoustic Tracks")
+                        st.subheader("Unacoustic tracks feel less instrumental, vocal, and raw.")
+
+                    for track_id in mood_tracks['acousticness'][:3]:
+                        st.markdown(track_embed(track_id, 80), unsafe_allow_html=True)
+
+            with st.container(border=True):
+                col1, col2 = st.columns(2)
+
+                with col1:
+                    # Display top danceable songs
+                    if show_most:
+                        st.title(":dancer: Most Danceable Tracks:")
+                        st.subheader("Danceable songs have strong beats, stable rhythms, and regular tempos!")
+                    else:
+                        st.title(":sleeping: Least Danceable Tracks:")
+                        st.subheader("Undanceable songs have weak beats, unstable rhythms, and irregular tempos")
+
+                    for track_id in mood_tracks['danceability'][:3]:
+                        st.markdown(track_embed(track_id, 80), unsafe_allow_html=True)
+
+                with col2:
+                    # Display top happy songs
+                    if show_most:
+                        st.title(":smile_cat: Most Happy Tracks:")
+                        st.subheader("Happy songs are measured by musical positivety that likely make you feel cheerful or euphoric.")
+                    else:
+                        st.title(":crying_cat_face: Least Happy Tracks:")
+                        st.subheader("Unhappy songs are measured by musical positivety that likely make you feel upset or emotional.")
+
+                    for track_id in mood_tracks['valence'][:3]:
+                        st.markdown(track_embed(track_id, 80), unsafe_allow_html=True)
+
+            first_paint_time = time.time() - artist_time
+            print(f"Time to first paint (summary sections): {first_paint_time} seconds")
+
+            with tracklist_container:
+                status_code, result = load_from_backend('search', Name_of_Artist, "Loading every track...")
+                if status_code == 200:
+                    df, _ = result
+                    tracklist_start = time.time()
+                    tracklist_trend(df)
+                    tracklist_end_time = time.time() - tracklist_start
+                    print(f"Time taken for tracklist trend chart: {tracklist_end_time} seconds")
+                elif status_code is not None:
+                    st.warning("Failed to retrieve the tracklist. Please try again later.")
+
+            full_load_time = time.time() - artist_time
+            print(f"Time to full load (per-track sections): {full_load_time} seconds")
+
+        elif status_code is not None:
+            st.warning("Failed to retrieve data. Please try again later.")
+            return
 
     else:
         st.warning("Please enter an artist name.")
@@ -605,9 +629,7 @@ def main():
     if st.session_state.currentPage == "page1":
         render_page_1()
     elif st.session_state.currentPage == "page2":
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        loop.run_until_complete(render_page_2())
+        render_page_2()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,96 @@
+import numpy as np
+import pandas as pd
+
+from track_analytics import extreme_indices, feature_matrix, sort_tracklist, top_bottom_tracks
+
+# Run with: python -m pytest spotify-app/test_track_analytics.py
+
+
+def as_lists(indices):
+    return [row.tolist() for row in indices]
+
+
+def test_extreme_indices_orders_best_first():
+    matrix = np.array([[0.2, 0.9, 0.5, 0.1]])
+    assert as_lists(extreme_indices(matrix, 2)) == [[1, 2]]
+    assert as_lists(extreme_indices(matrix, 2, largest=False)) == [[3, 0]]
+
+
+def test_extreme_indices_ties_keep_column_order():
+    # Ties straddle the k-th position, so argpartition alone could pick any of them
+    matrix = np.array([[0.5, 0.7, 0.5, 0.5, 0.7, 0.1]])
+    assert as_lists(extreme_indices(matrix, 3)) == [[1, 4, 0]]
+    assert as_lists(extreme_indices(matrix, 3, largest=False)) == [[5, 0, 2]]
+
+
+def test_extreme_indices_matches_stable_sort():
+    rng = np.random.default_rng(0)
+    matrix = rng.integers(0, 20, (6, 500)).astype(np.float64)
+    matrix[rng.random(matrix.shape) < 0.1] = np.nan
+    for largest in (True, False):
+        for row, indices in zip(matrix, extreme_indices(matrix, 7, largest)):
+            present = np.flatnonzero(~np.isnan(row))
+            expected = present[np.argsort(-row[present] if largest else row[present], kind='stable')[:7]]
+            assert indices.tolist() == expected.tolist()
+
+
+def test_extreme_indices_skips_nan():
+    matrix = np.array([[np.nan, 0.3, np.nan, 0.8, 0.1]])
+    assert as_lists(extreme_indices(matrix, 2)) == [[3, 1]]
+    assert as_lists(extreme_indices(matrix, 2, largest=False)) == [[4, 1]]
+
+
+def test_extreme_indices_rows_with_fewer_than_k_values():
+    matrix = np.array([[np.nan, 0.3, np.nan, 0.8],
+                       [0.4, 0.2, 0.6, 0.1]])
+    assert as_lists(extreme_indices(matrix, 3)) == [[3, 1], [2, 0, 1]]
+    assert as_lists(extreme_indices(matrix, 10)) == [[3, 1], [2, 0, 1, 3]]
+
+
+def test_extreme_indices_all_nan_row():
+    matrix = np.array([[np.nan, np.nan, np.nan],
+                       [0.1, 0.3, 0.2]])
+    assert as_lists(extreme_indices(matrix, 2)) == [[], [1, 2]]
+    assert as_lists(extreme_indices(matrix, 2, largest=False)) == [[], [0, 2]]
+
+
+def test_extreme_indices_zero_tracks_and_zero_k():
+    assert as_lists(extreme_indices(np.empty((3, 0)), 5)) == [[], [], []]
+    assert as_lists(extreme_indices(np.array([[0.1, 0.2]]), 0)) == [[]]
+
+
+def test_top_bottom_tracks_maps_to_ids():
+    df = pd.DataFrame({'track_id': ['a', 'b', 'c'], 'energy': [0.1, 0.9, None], 'valence': [0.5, 0.2, 0.7]})
+    top, bottom = top_bottom_tracks(df['track_id'], feature_matrix(df, ['energy', 'valence']), ['energy', 'valence'], 2)
+    assert top == {'energy': ['b', 'a'], 'valence': ['c', 'a']}
+    assert bottom == {'energy': ['a', 'b'], 'valence': ['b', 'a']}
+
+
+def test_sort_tracklist_groups_albums_and_orders_tracks():
+    df = pd.DataFrame({
+        'track_id': ['b2', 'a1', 'b1', 'a3', 'a2'],
+        'album_name': ['B', 'A', 'B', 'A', 'A'],
+        'track_number': [2, 1, 1, 3, 2]
+    })
+    result = sort_tracklist(df)
+    assert result['track_id'].tolist() == ['a1', 'a2', 'a3', 'b1', 'b2']
+    assert result.index.tolist() == list(range(5))
+
+
+def test_sort_tracklist_keeps_order_of_equal_track_numbers():
+    df = pd.DataFrame({'track_id': ['x', 'y', 'z'], 'album_name': ['A', 'A', 'A'], 'track_number': [1, 1, 0]})
+    assert sort_tracklist(df)['track_id'].tolist() == ['z', 'x', 'y']
+
+
+def test_sort_tracklist_nan_track_numbers_go_last_in_their_album():
+    df = pd.DataFrame({
+        'track_id': ['a?', 'a2', 'b1', 'a1', 'b?'],
+        'album_name': ['A', 'A', 'B', 'A', 'B'],
+        'track_number': [np.nan, 2, 1, 1, np.nan]
+    })
+    assert sort_tracklist(df)['track_id'].tolist() == ['a1', 'a2', 'a?', 'b1', 'b?']
+
+
+def test_sort_tracklist_empty_frame():
+    df = pd.DataFrame({'track_id': [], 'album_name': [], 'track_number': []})
+    assert sort_tracklist(df).empty
@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+
+# Vectorized helpers behind the artist dashboard. The track features are held as one
+# (features x tracks) float64 matrix, NaN where Spotify had no value, so the top and bottom
+# tracks of every feature come out of a single argpartition instead of a sort per feature.
+# benchmark_analytics.py times these against the per-feature pandas versions.
+
+
+def feature_matrix(df, features):
+    return np.vstack([df[feature].to_numpy(dtype=np.float64, na_value=np.nan) for feature in features])
+
+
+def extreme_indices(matrix, k, largest=True):
+    # Column indices of the k largest (or smallest) values of each row, best first. NaN is skipped
+    # and ties keep column order, i.e. the same tracks a stable sort would pick; rows with fewer
+    # than k values get fewer indices.
+    scores = -matrix if largest else matrix
+    rows, columns = scores.shape
+    k = min(k, columns)
+    if k == 0:
+        return [np.empty(0, dtype=np.intp) for _ in range(rows)]
+
+    # argpartition moves each row's k best values to the front (NaN goes last). Everything up to
+    # the k-th best value is a candidate, so ties on the boundary aren't dropped arbitrarily.
+    best = np.take_along_axis(scores, np.argpartition(scores, k - 1, axis=1)[:, :k], axis=1)
+    kth = np.fmax.reduce(best, axis=1)
+    row, column = np.nonzero(scores <= kth[:, None])
+
+    # Only the candidates are sorted, all rows at once: by row, then value, then column
+    order = np.lexsort((column, scores[row, column], row))
+    row, column = row[order], column[order]
+    rank = np.arange(len(row)) - np.searchsorted(row, row)
+    row, column = row[rank < k], column[rank < k]
+    return np.split(column, np.searchsorted(row, np.arange(1, rows)))
+
+
+def top_bottom_tracks(track_ids, matrix, features, k):
+    # ({feature: [track ids, highest first]}, {feature: [track ids, lowest first]})
+    track_ids = np.asarray(track_ids, dtype=object)
+    top = extreme_indices(matrix, k, largest=True)
+    bottom = extreme_indices(matrix, k, largest=False)
+    return ({feature: track_ids[indices].tolist() for feature, indices in zip(features, top)},
+            {feature: track_ids[indices].tolist() for feature, indices in zip(features, bottom)})
+
+
+def sort_tracklist(df):
+    # Rows grouped by album (alphabetically) and ordered by track number within each album, the
+    # order the Tracklist Trend plots in. One lexsort over the whole frame; equal keys keep their order.
+    album_codes, _ = pd.factorize(df['album_name'], sort=True)
+    track_numbers = df['track_number'].to_numpy(dtype=np.float64, na_value=np.nan)
+    return df.iloc[np.lexsort((track_numbers, album_codes))].reset_index(drop=True)